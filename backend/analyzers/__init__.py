@@ -0,0 +1,101 @@
+"""Registry of exercise analyzers.
+
+Analyzers are registered by exercise type with the dotted path of the
+module implementing them and the derived pose features they read. Modules
+are only imported the first time an exercise of that type is analyzed, and
+the declared features are computed once per pose series and shared between
+analyzers (see analyzers/features.py).
+
+An analyzer module exposes ``ANALYZER_VERSION`` and a function taking
+``(pose_data, features, timeline_points=None)`` and returning a
+FormAnalysis, with an angle timeline (see analyzers/timeline.py) when
+timeline_points is given.
+"""
+from __future__ import annotations
+
+import importlib
+from typing import Callable, NamedTuple
+
+from analyzers.features import PoseFeatures
+from models.schemas import FormAnalysis
+
+
+class AnalyzerSpec(NamedTuple):
+    exercise_type: str
+    module: str
+    function: str
+    features: tuple[str, ...]
+
+
+_REGISTRY: dict[str, AnalyzerSpec] = {}
+
+
+def register(
+    exercise_type: str, module: str, function: str, features: tuple[str, ...] = ()
+) -> None:
+    _REGISTRY[exercise_type] = AnalyzerSpec(exercise_type, module, function, features)
+
+
+def supported_exercises() -> list[str]:
+    return sorted(_REGISTRY)
+
+
+def registered_analyzers() -> list[AnalyzerSpec]:
+    return [_REGISTRY[name] for name in supported_exercises()]
+
+
+def find_analyzer(exercise_name: str) -> AnalyzerSpec | None:
+    """Match a user-entered exercise name (e.g. "Barbell Back Squat")."""
+    name = exercise_name.lower()
+    for exercise_type, spec in _REGISTRY.items():
+        if exercise_type in name:
+            return spec
+    return None
+
+
+def load(spec: AnalyzerSpec) -> Callable[..., FormAnalysis]:
+    module = importlib.import_module(spec.module)
+    return getattr(module, spec.function)
+
+
+def analyzer_version(spec: AnalyzerSpec) -> str:
+    return importlib.import_module(spec.module).ANALYZER_VERSION
+
+
+def analyze(
+    spec: AnalyzerSpec,
+    pose_data: list[tuple[float, dict]],
+    features: PoseFeatures | None = None,
+    timeline_points: int | None = None,
+) -> FormAnalysis:
+    if features is None:
+        features = PoseFeatures.from_pose_data(pose_data)
+    features.prefetch(spec.features)
+    return load(spec)(pose_data, features, timeline_points=timeline_points)
+
+
+def analyze_many(
+    specs: list[AnalyzerSpec], pose_data: list[tuple[float, dict]]
+) -> dict[str, FormAnalysis]:
+    """Analyze one pose series under several exercise hypotheses.
+
+    All declared features are computed in a single pass up front.
+    """
+    features = PoseFeatures.from_pose_data(pose_data)
+    features.prefetch({name for spec in specs for name in spec.features})
+    return {spec.exercise_type: analyze(spec, pose_data, features) for spec in specs}
+
+
+register(
+    "squat",
+    "analyzers.squat",
+    "analyze_squat",
+    features=(
+        "knee_angle",
+        "hip_angle",
+        "torso_angle",
+        "knee_valgus",
+        "foot_width",
+        "shoulder_width",
+    ),
+)
@@ -0,0 +1,158 @@
+"""Derived per-frame features computed once per pose series.
+
+Analyzers declare the features they need when they are registered (see
+analyzers/__init__.py). A PoseFeatures instance computes each feature over
+the whole series in one vectorized pass the first time it is requested and
+caches it, so several analyzers run on the same video share the work.
+"""
+from __future__ import annotations
+
+from typing import Callable
+
+import numpy as np
+
+from analyzers.landmarks import (
+    L_SHOULDER,
+    R_SHOULDER,
+    L_HIP,
+    R_HIP,
+    L_KNEE,
+    R_KNEE,
+    L_ANKLE,
+    R_ANKLE,
+    L_FOOT,
+    R_FOOT,
+)
+from utils.angles import calculate_angles, angles_to_vertical
+from utils.smoothing import smooth_landmarks
+
+_FEATURES: dict[str, Callable[["PoseFeatures"], np.ndarray]] = {}
+
+
+def feature(name: str):
+    """Register a feature function under the given name."""
+
+    def decorator(fn):
+        _FEATURES[name] = fn
+        return fn
+
+    return decorator
+
+
+def available_features() -> list[str]:
+    return sorted(_FEATURES)
+
+
+class PoseFeatures:
+    def __init__(self, timestamps: np.ndarray, points: np.ndarray):
+        """
+        Args:
+            timestamps: Array of shape (frames,)
+            points: Array of shape (frames, landmarks, 3) holding x, y, visibility
+        """
+        self.timestamps = timestamps
+        self.points = points
+        self._cache: dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_pose_data(
+        cls, pose_data: list[tuple[float, dict]], smooth: bool = True
+    ) -> PoseFeatures:
+        """Build features from (timestamp, landmarks) pairs.
+
+        Landmarks are temporally smoothed (weighted by visibility) unless
+        ``smooth`` is False, so features are stable even at low sampling rates.
+        """
+        if not pose_data:
+            return cls(np.zeros(0), np.zeros((0, 0, 3)))
+        timestamps = np.array([t for t, _ in pose_data], dtype=np.float64)
+        points = np.array(
+            [[landmarks[idx] for idx in sorted(landmarks)] for _, landmarks in pose_data],
+            dtype=np.float64,
+        )
+        return cls.from_arrays(timestamps, points, smooth)
+
+    @classmethod
+    def from_arrays(
+        cls, timestamps: np.ndarray, points: np.ndarray, smooth: bool = True
+    ) -> PoseFeatures:
+        """Build features from arrays already laid out as (frames, landmarks, 3)."""
+        if smooth and len(timestamps):
+            points = smooth_landmarks(timestamps, points)
+        return cls(timestamps, points)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def xy(self, idx: int) -> np.ndarray:
+        """(frames, 2) coordinates of one landmark."""
+        return self.points[:, idx, :2]
+
+    def mid_xy(self, idx1: int, idx2: int) -> np.ndarray:
+        return (self.xy(idx1) + self.xy(idx2)) / 2
+
+    def get(self, name: str) -> np.ndarray:
+        """Return the named feature, computing it on first access."""
+        if name not in self._cache:
+            if name not in _FEATURES:
+                raise KeyError(f"Unknown pose feature: {name}")
+            self._cache[name] = _FEATURES[name](self)
+        return self._cache[name]
+
+    def prefetch(self, names) -> None:
+        for name in names:
+            self.get(name)
+
+
+@feature("left_knee_angle")
+def _left_knee_angle(f: PoseFeatures) -> np.ndarray:
+    return calculate_angles(f.xy(L_HIP), f.xy(L_KNEE), f.xy(L_ANKLE))
+
+
+@feature("right_knee_angle")
+def _right_knee_angle(f: PoseFeatures) -> np.ndarray:
+    return calculate_angles(f.xy(R_HIP), f.xy(R_KNEE), f.xy(R_ANKLE))
+
+
+@feature("knee_angle")
+def _knee_angle(f: PoseFeatures) -> np.ndarray:
+    """Average of left and right hip-knee-ankle angles."""
+    return (f.get("left_knee_angle") + f.get("right_knee_angle")) / 2
+
+
+@feature("hip_angle")
+def _hip_angle(f: PoseFeatures) -> np.ndarray:
+    """Shoulder-hip-knee angle using the midpoints of both sides."""
+    return calculate_angles(
+        f.mid_xy(L_SHOULDER, R_SHOULDER),
+        f.mid_xy(L_HIP, R_HIP),
+        f.mid_xy(L_KNEE, R_KNEE),
+    )
+
+
+@feature("torso_angle")
+def _torso_angle(f: PoseFeatures) -> np.ndarray:
+    """Mid shoulder to mid hip angle from vertical (0 = upright)."""
+    return angles_to_vertical(f.mid_xy(L_SHOULDER, R_SHOULDER), f.mid_xy(L_HIP, R_HIP))
+
+
+@feature("knee_valgus")
+def _knee_valgus(f: PoseFeatures) -> np.ndarray:
+    """Largest inward knee offset from the ankle in normalized x.
+
+    Positive when a knee caves toward the midline (left knee right of the
+    left ankle, or right knee left of the right ankle).
+    """
+    l_diff = f.xy(L_KNEE)[:, 0] - f.xy(L_ANKLE)[:, 0]
+    r_diff = f.xy(R_ANKLE)[:, 0] - f.xy(R_KNEE)[:, 0]
+    return np.maximum(l_diff, r_diff)
+
+
+@feature("foot_width")
+def _foot_width(f: PoseFeatures) -> np.ndarray:
+    return np.abs(f.xy(R_FOOT)[:, 0] - f.xy(L_FOOT)[:, 0])
+
+
+@feature("shoulder_width")
+def _shoulder_width(f: PoseFeatures) -> np.ndarray:
+    return np.abs(f.xy(R_SHOULDER)[:, 0] - f.xy(L_SHOULDER)[:, 0])
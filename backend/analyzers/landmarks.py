@@ -0,0 +1,18 @@
+"""Pose landmark indices shared by the analyzers and feature extraction.
+
+These mirror mediapipe's PoseLandmark enum. They are plain ints so that
+importing an analyzer doesn't pull in mediapipe just to read the indices.
+"""
+
+NUM_LANDMARKS = 33
+
+L_SHOULDER = 11
+R_SHOULDER = 12
+L_HIP = 23
+R_HIP = 24
+L_KNEE = 25
+R_KNEE = 26
+L_ANKLE = 27
+R_ANKLE = 28
+L_FOOT = 31
+R_FOOT = 32
@@ -1,23 +1,12 @@
 from __future__ import annotations
 
-import mediapipe as mp
 from models.schemas import FormAnalysis, KeyPoint
-from utils.angles import calculate_angle, angle_to_vertical
-
-mp_pose = mp.solutions.pose
-PoseLandmark = mp_pose.PoseLandmark
-
-# Landmark indices
-L_SHOULDER = PoseLandmark.LEFT_SHOULDER
-R_SHOULDER = PoseLandmark.RIGHT_SHOULDER
-L_HIP = PoseLandmark.LEFT_HIP
-R_HIP = PoseLandmark.RIGHT_HIP
-L_KNEE = PoseLandmark.LEFT_KNEE
-R_KNEE = PoseLandmark.RIGHT_KNEE
-L_ANKLE = PoseLandmark.LEFT_ANKLE
-R_ANKLE = PoseLandmark.RIGHT_ANKLE
-L_FOOT = PoseLandmark.LEFT_FOOT_INDEX
-R_FOOT = PoseLandmark.RIGHT_FOOT_INDEX
+from analyzers.features import PoseFeatures
+from analyzers.timeline import build_timeline
+
+# Bump whenever thresholds, weights or scoring logic change so stored results
+# can be re-scored with scripts/rescore.py.
+ANALYZER_VERSION = "squat-2"
 
 # Rep detection states
 STANDING = "STANDING"
@@ -29,49 +18,30 @@ STANDING_THRESHOLD = 160
 DESCENDING_THRESHOLD = 140
 BOTTOM_THRESHOLD = 110
 
-
-def _lm_xy(landmarks: dict, idx) -> tuple:
-    """Extract (x, y) from landmarks dict."""
-    return (landmarks[idx][0], landmarks[idx][1])
-
-
-def _avg_xy(landmarks: dict, idx1, idx2) -> tuple:
-    a = _lm_xy(landmarks, idx1)
-    b = _lm_xy(landmarks, idx2)
-    return ((a[0] + b[0]) / 2, (a[1] + b[1]) / 2)
-
-
-def _knee_angle(landmarks: dict, side: str = "left") -> float:
-    """Calculate hip-knee-ankle angle for given side."""
-    if side == "left":
-        hip, knee, ankle = L_HIP, L_KNEE, L_ANKLE
-    else:
-        hip, knee, ankle = R_HIP, R_KNEE, R_ANKLE
-    return calculate_angle(
-        _lm_xy(landmarks, hip),
-        _lm_xy(landmarks, knee),
-        _lm_xy(landmarks, ankle),
-    )
-
-
-def _avg_knee_angle(landmarks: dict) -> float:
-    return (_knee_angle(landmarks, "left") + _knee_angle(landmarks, "right")) / 2
+TIMELINE_ANGLES = ("knee_angle", "hip_angle", "torso_angle")
 
 
 def detect_reps(
     pose_data: list[tuple[float, dict]],
+    features: PoseFeatures | None = None,
 ) -> list[dict]:
     """Detect squat reps using a state machine on knee angle.
 
     Returns list of reps, each with:
         - bottom_timestamp: float
         - bottom_landmarks: dict
+        - bottom_index: int (frame index into pose_data / features)
         - min_knee_angle: float
         - descent_start_timestamp: float
+        - start_index: int (frame index where the descent started)
+        - end_index: int (frame index where the lifter was standing again)
         - frames: list of (timestamp, landmarks) during the rep
     """
     if not pose_data:
         return []
+    if features is None:
+        features = PoseFeatures.from_pose_data(pose_data)
+    knee_angles = features.get("knee_angle").tolist()
 
     state = STANDING
     reps = []
@@ -79,18 +49,22 @@ def detect_reps(
     min_angle = 180.0
     min_angle_timestamp = 0.0
     min_angle_landmarks = None
+    min_angle_index = 0
     descent_start_timestamp = 0.0
+    descent_start_index = 0
 
-    for timestamp, landmarks in pose_data:
-        angle = _avg_knee_angle(landmarks)
+    for i, (timestamp, landmarks) in enumerate(pose_data):
+        angle = knee_angles[i]
 
         if state == STANDING:
             if angle < DESCENDING_THRESHOLD:
                 state = DESCENDING
                 descent_start_timestamp = timestamp
+                descent_start_index = i
                 min_angle = angle
                 min_angle_timestamp = timestamp
                 min_angle_landmarks = landmarks
+                min_angle_index = i
                 current_rep_frames = [(timestamp, landmarks)]
 
         elif state == DESCENDING:
@@ -99,6 +73,7 @@ def detect_reps(
                 min_angle = angle
                 min_angle_timestamp = timestamp
                 min_angle_landmarks = landmarks
+                min_angle_index = i
             if angle <= BOTTOM_THRESHOLD:
                 state = BOTTOM
             elif angle > STANDING_THRESHOLD:
@@ -112,6 +87,7 @@ def detect_reps(
                 min_angle = angle
                 min_angle_timestamp = timestamp
                 min_angle_landmarks = landmarks
+                min_angle_index = i
             if angle > DESCENDING_THRESHOLD:
                 state = ASCENDING
 
@@ -122,8 +98,11 @@ def detect_reps(
                     {
                         "bottom_timestamp": min_angle_timestamp,
                         "bottom_landmarks": min_angle_landmarks,
+                        "bottom_index": min_angle_index,
                         "min_knee_angle": min_angle,
                         "descent_start_timestamp": descent_start_timestamp,
+                        "start_index": descent_start_index,
+                        "end_index": i,
                         "frames": current_rep_frames,
                     }
                 )
@@ -146,20 +125,8 @@ def _check_depth(min_knee_angle: float) -> tuple[float, str]:
         return 0.1, "Shallow squat — significantly more depth needed"
 
 
-def _check_knee_tracking(bottom_landmarks: dict) -> tuple[float, str]:
+def _check_knee_tracking(max_cave: float) -> tuple[float, str]:
     """Score knee tracking (25% weight). Compare knee x vs ankle x for valgus."""
-    l_knee_x = _lm_xy(bottom_landmarks, L_KNEE)[0]
-    r_knee_x = _lm_xy(bottom_landmarks, R_KNEE)[0]
-    l_ankle_x = _lm_xy(bottom_landmarks, L_ANKLE)[0]
-    r_ankle_x = _lm_xy(bottom_landmarks, R_ANKLE)[0]
-
-    # Knee valgus: knees collapsing inward (left knee right of left ankle,
-    # right knee left of right ankle in normalized coords)
-    l_diff = l_knee_x - l_ankle_x  # Positive = knee caving right (inward for left)
-    r_diff = r_ankle_x - r_knee_x  # Positive = knee caving left (inward for right)
-
-    max_cave = max(l_diff, r_diff)
-
     if max_cave < 0.01:
         return 1.0, "Knees tracking well over toes"
     elif max_cave < 0.03:
@@ -170,13 +137,8 @@ def _check_knee_tracking(bottom_landmarks: dict) -> tuple[float, str]:
         return 0.1, "Significant knee valgus — reduce weight and work on form"
 
 
-def _check_torso_angle(bottom_landmarks: dict) -> tuple[float, str]:
+def _check_torso_angle(torso_angle: float) -> tuple[float, str]:
     """Score torso angle (25% weight). Shoulder-hip angle vs vertical. <30 = good."""
-    mid_shoulder = _avg_xy(bottom_landmarks, L_SHOULDER, R_SHOULDER)
-    mid_hip = _avg_xy(bottom_landmarks, L_HIP, R_HIP)
-
-    torso_angle = angle_to_vertical(mid_shoulder, mid_hip)
-
     if torso_angle < 30:
         return 1.0, "Good torso angle — staying upright"
     elif torso_angle < 45:
@@ -187,16 +149,10 @@ def _check_torso_angle(bottom_landmarks: dict) -> tuple[float, str]:
         return 0.1, "Very excessive forward lean — risk of lower back strain"
 
 
-def _check_stance_width(bottom_landmarks: dict) -> tuple[float, str]:
+def _check_stance_width(
+    foot_width: float, shoulder_width: float
+) -> tuple[float, str]:
     """Score stance width (10% weight). Foot distance vs shoulder distance ratio."""
-    l_foot_x = _lm_xy(bottom_landmarks, L_FOOT)[0]
-    r_foot_x = _lm_xy(bottom_landmarks, R_FOOT)[0]
-    l_shoulder_x = _lm_xy(bottom_landmarks, L_SHOULDER)[0]
-    r_shoulder_x = _lm_xy(bottom_landmarks, R_SHOULDER)[0]
-
-    foot_width = abs(r_foot_x - l_foot_x)
-    shoulder_width = abs(r_shoulder_x - l_shoulder_x)
-
     if shoulder_width < 0.01:
         return 0.5, "Could not reliably measure stance width"
 
@@ -212,31 +168,21 @@ def _check_stance_width(bottom_landmarks: dict) -> tuple[float, str]:
         return 0.3, "Stance width is unusual — aim for shoulder to 1.5x shoulder width"
 
 
-def _check_hip_hinge(rep: dict) -> tuple[float, str]:
+def _check_hip_hinge(rep: dict, features: PoseFeatures) -> tuple[float, str]:
     """Score hip hinge (10% weight). Hip should break before knee at descent start."""
     frames = rep["frames"]
     if len(frames) < 3:
         return 0.5, "Not enough frames to evaluate hip hinge"
 
     # Look at first few frames of descent
-    start_landmarks = frames[0][1]
-    early_landmarks = frames[min(2, len(frames) - 1)][1]
-
-    # Hip angle change (shoulder-hip-knee)
-    hip_angle_start = calculate_angle(
-        _avg_xy(start_landmarks, L_SHOULDER, R_SHOULDER),
-        _avg_xy(start_landmarks, L_HIP, R_HIP),
-        _avg_xy(start_landmarks, L_KNEE, R_KNEE),
-    )
-    hip_angle_early = calculate_angle(
-        _avg_xy(early_landmarks, L_SHOULDER, R_SHOULDER),
-        _avg_xy(early_landmarks, L_HIP, R_HIP),
-        _avg_xy(early_landmarks, L_KNEE, R_KNEE),
-    )
+    start = rep["start_index"]
+    early = start + min(2, len(frames) - 1)
 
-    # Knee angle change
-    knee_start = _avg_knee_angle(start_landmarks)
-    knee_early = _avg_knee_angle(early_landmarks)
+    # Hip angle change (shoulder-hip-knee) vs knee angle change
+    hip_angles = features.get("hip_angle")
+    knee_angles = features.get("knee_angle")
+    hip_angle_start, hip_angle_early = hip_angles[start], hip_angles[early]
+    knee_start, knee_early = knee_angles[start], knee_angles[early]
 
     hip_change = abs(hip_angle_start - hip_angle_early)
     knee_change = abs(knee_start - knee_early)
@@ -249,15 +195,33 @@ def _check_hip_hinge(rep: dict) -> tuple[float, str]:
         return 0.2, "Knee-dominant descent — push hips back first"
 
 
-def analyze_squat(pose_data: list[tuple[float, dict]]) -> FormAnalysis:
-    """Run full squat analysis on pose data from video frames."""
-    reps = detect_reps(pose_data)
+def analyze_squat(
+    pose_data: list[tuple[float, dict]],
+    features: PoseFeatures | None = None,
+    timeline_points: int | None = None,
+) -> FormAnalysis:
+    """Run full squat analysis on pose data from video frames.
+
+    Pass a shared PoseFeatures to reuse features already computed for the
+    same series by other analyzers. With timeline_points, the result also
+    carries knee, hip and torso angles downsampled to about that many points.
+    """
+    if features is None:
+        features = PoseFeatures.from_pose_data(pose_data)
+    reps = detect_reps(pose_data, features)
+    timeline = (
+        build_timeline(features, TIMELINE_ANGLES, reps, timeline_points)
+        if timeline_points
+        else None
+    )
 
     if not reps:
         return FormAnalysis(
             score=0,
             feedback=["No complete squat reps detected in the video."],
             keyPoints=[],
+            analyzerVersion=ANALYZER_VERSION,
+            timeline=timeline,
         )
 
     # Analyze each rep and average scores
@@ -267,10 +231,18 @@ def analyze_squat(pose_data: list[tuple[float, dict]]) -> FormAnalysis:
 
     for i, rep in enumerate(reps):
         depth_score, depth_fb = _check_depth(rep["min_knee_angle"])
-        knee_score, knee_fb = _check_knee_tracking(rep["bottom_landmarks"])
-        torso_score, torso_fb = _check_torso_angle(rep["bottom_landmarks"])
-        stance_score, stance_fb = _check_stance_width(rep["bottom_landmarks"])
-        hinge_score, hinge_fb = _check_hip_hinge(rep)
+        bottom = rep["bottom_index"]
+        knee_score, knee_fb = _check_knee_tracking(
+            float(features.get("knee_valgus")[bottom])
+        )
+        torso_score, torso_fb = _check_torso_angle(
+            float(features.get("torso_angle")[bottom])
+        )
+        stance_score, stance_fb = _check_stance_width(
+            float(features.get("foot_width")[bottom]),
+            float(features.get("shoulder_width")[bottom]),
+        )
+        hinge_score, hinge_fb = _check_hip_hinge(rep, features)
 
         all_scores["depth"].append(depth_score)
         all_scores["knee"].append(knee_score)
@@ -340,4 +312,7 @@ def analyze_squat(pose_data: list[tuple[float, dict]]) -> FormAnalysis:
         score=final_score,
         feedback=feedback,
         keyPoints=key_points,
+        categoryScores={cat: round(v, 3) for cat, v in avg_scores.items()},
+        analyzerVersion=ANALYZER_VERSION,
+        timeline=timeline,
     )
@@ -0,0 +1,142 @@
+"""Downsampled joint-angle timelines for charting alongside the video.
+
+Angles come from the same PoseFeatures the analyzer scored, so the chart
+matches the feedback. The series are reduced with Largest-Triangle-Three-
+Buckets (LTTB), which keeps peaks and troughs that plain decimation drops.
+All angle series share one set of sample frames, chosen by the summed
+triangle area of the range-normalized series. Frames that must appear
+exactly (rep starts, bottoms and ends) are fixed anchors, and LTTB runs
+between consecutive anchors with the point budget split by how much the angles
+move in each segment.
+"""
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+from analyzers.features import PoseFeatures
+from models.schemas import MAX_TIMELINE_POINTS, AngleTimeline, TimelineRep
+
+
+def _allocate(weights: np.ndarray, room: np.ndarray, budget: int) -> np.ndarray:
+    """Split budget over segments in proportion to weight, at most room each."""
+    alloc = np.zeros(len(room), dtype=int)
+    while budget > 0:
+        free = room - alloc
+        w = np.where(free > 0, weights, 0.0)
+        if w.sum() <= 0:
+            w = (free > 0).astype(float)
+        ideal = budget * w / w.sum()
+        step = np.minimum(np.floor(ideal).astype(int), free)
+        if step.sum() == 0:
+            step[np.argmax(np.where(free > 0, ideal, -1.0))] = 1
+        alloc += step
+        budget -= int(step.sum())
+    return alloc
+
+
+def _lttb_segment(x: np.ndarray, ys: np.ndarray, lo: int, hi: int, n_inner: int) -> list[int]:
+    """Pick n_inner frames strictly between anchors lo and hi."""
+    if n_inner <= 0:
+        return []
+    if n_inner >= hi - lo - 1:
+        return list(range(lo + 1, hi))
+
+    edges = np.linspace(lo + 1, hi, n_inner + 1).astype(int)
+    picked = []
+    prev = lo
+    for b in range(n_inner):
+        start, end = edges[b], edges[b + 1]
+        # Third vertex: mean of the next bucket, or the closing anchor
+        if b + 1 < n_inner:
+            nxt = slice(edges[b + 1], edges[b + 2])
+            cx, cy = x[nxt].mean(), ys[:, nxt].mean(axis=1)
+        else:
+            cx, cy = x[hi], ys[:, hi]
+        ax, ay = x[prev], ys[:, prev]
+        bx, by = x[start:end], ys[:, start:end]
+        area = np.abs(
+            (ax - cx) * (by - ay[:, None]) - (ax - bx) * (cy - ay)[:, None]
+        ).sum(axis=0)
+        prev = start + int(np.argmax(area))
+        picked.append(prev)
+    return picked
+
+
+def lttb_indices(
+    x: np.ndarray, ys: np.ndarray, n_out: int, keep: Sequence[int] = ()
+) -> np.ndarray:
+    """Indices of about n_out frames that preserve the shape of ys.
+
+    Args:
+        x: Array of shape (frames,), increasing
+        ys: Array of shape (series, frames)
+        n_out: Target number of frames
+        keep: Frames that must be included; the first and last always are
+
+    Returns:
+        Sorted indices; max(n_out, len(anchors)) of them, or every frame
+        if there are fewer than that
+    """
+    n = len(x)
+    anchors = np.unique(np.concatenate([[0, n - 1], np.asarray(keep, dtype=int)]))
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    budget = n_out - len(anchors)
+    if budget <= 0:
+        return anchors
+
+    # Normalize so every series (and time) weighs the same in the area
+    span = np.ptp(ys, axis=1, keepdims=True)
+    ys = (ys - ys.min(axis=1, keepdims=True)) / np.where(span > 0, span, 1)
+    x = (x - x[0]) / ((x[-1] - x[0]) or 1)
+
+    # Segments where the angles move more get more of the budget
+    variation = np.abs(np.diff(ys, axis=1)).sum(axis=0)
+    cumulative = np.concatenate([[0.0], np.cumsum(variation)])
+    weights = cumulative[anchors[1:]] - cumulative[anchors[:-1]]
+    alloc = _allocate(weights, np.diff(anchors) - 1, budget)
+    picked = [anchors]
+    for lo, hi, n_inner in zip(anchors[:-1], anchors[1:], alloc):
+        picked.append(np.asarray(_lttb_segment(x, ys, lo, hi, n_inner), dtype=int))
+    return np.sort(np.concatenate(picked))
+
+
+def build_timeline(
+    features: PoseFeatures,
+    names: Sequence[str],
+    reps: list[dict],
+    max_points: int,
+) -> AngleTimeline:
+    """Downsample the named angle features to at most max_points samples.
+
+    max_points is capped at MAX_TIMELINE_POINTS and is never exceeded. Each
+    listed rep's start_index, bottom_index and end_index are samples. When
+    the series has more frames than max_points and the reps' markers plus
+    the first and last frame don't fit, only (max_points - 2) // 3 reps,
+    evenly spread over the session, are listed; the rest are charted only
+    through the downsampled angles.
+    """
+    max_points = min(max_points, MAX_TIMELINE_POINTS)
+    x = features.timestamps
+    ys = np.vstack([features.get(name) for name in names])
+    fit = (max_points - 2) // 3
+    if len(x) > max_points and len(reps) > fit:
+        spread = np.unique(np.linspace(0, len(reps) - 1, fit).round().astype(int))
+        reps = [reps[i] for i in spread]
+    keep = [rep[key] for rep in reps for key in ("start_index", "bottom_index", "end_index")]
+    idx = lttb_indices(x, ys, max_points, keep) if len(x) else np.zeros(0, dtype=int)
+
+    return AngleTimeline(
+        timestamps=np.round(x[idx], 3).tolist(),
+        angles={name: np.round(ys[i, idx], 1).tolist() for i, name in enumerate(names)},
+        reps=[
+            TimelineRep(
+                start=round(float(x[rep["start_index"]]), 3),
+                bottom=round(float(x[rep["bottom_index"]]), 3),
+                end=round(float(x[rep["end_index"]]), 3),
+            )
+            for rep in reps
+        ],
+    )
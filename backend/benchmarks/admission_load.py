@@ -0,0 +1,149 @@
+"""Drive the analysis admission controller past capacity.
+
+Fires bursts of simulated analyses (a sleep standing in for the pipeline)
+from many users at once, well above what the controller admits, and checks
+that:
+- admitted requests' p99 latency stays within the bound the queue implies
+  (at most ceil(max_queue / max_concurrent) + 1 service times)
+- rejections are answered fast and carry a Retry-After
+- no single user or address gets more than its limit in flight
+- the wait queue still fills up when users share a few addresses (NAT)
+
+Exits non-zero if any check fails.
+
+Usage (from backend/):
+    python benchmarks/admission_load.py [--clients N] [--service-ms MS]
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.admission import AdmissionController, AdmissionRejected  # noqa: E402
+
+
+def _p(values: list[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--heavy-user-share", type=float, default=0.5,
+                        help="fraction of requests sent by a single abusive user")
+    parser.add_argument("--service-ms", type=float, default=100)
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=8)
+    parser.add_argument("--per-user-limit", type=int, default=2)
+    parser.add_argument("--addresses", type=int, default=2,
+                        help="addresses the users are spread over")
+    parser.add_argument("--per-address-limit", type=int, default=6)
+    parser.add_argument("--duration-s", type=float, default=5.0)
+    args = parser.parse_args()
+
+    service = args.service_ms / 1000
+    controller = AdmissionController(
+        max_concurrent=args.max_concurrent,
+        max_queue=args.max_queue,
+        per_user_limit=args.per_user_limit,
+        per_address_limit=args.per_address_limit,
+        queue_timeout=30.0,
+    )
+
+    lock = threading.Lock()
+    admitted: list[float] = []
+    rejected: list[float] = []
+    statuses: dict[int, int] = {}
+    missing_retry_after = 0
+    in_flight: dict[str, int] = {}
+    max_user_in_flight = 0
+    max_address_in_flight = 0
+
+    def client(i: int):
+        nonlocal missing_retry_after, max_user_in_flight, max_address_in_flight
+        rng = random.Random(i)
+        stop_at = time.monotonic() + args.duration_s
+        while time.monotonic() < stop_at:
+            user = (
+                "heavy"
+                if rng.random() < args.heavy_user_share
+                else f"user-{rng.randrange(args.users)}"
+            )
+            address = f"10.0.0.{zlib.crc32(user.encode()) % args.addresses}"
+            started = time.monotonic()
+            try:
+                with controller.slot(user, address):
+                    with lock:
+                        in_flight[user] = in_flight.get(user, 0) + 1
+                        in_flight[address] = in_flight.get(address, 0) + 1
+                        max_user_in_flight = max(max_user_in_flight, in_flight[user])
+                        max_address_in_flight = max(
+                            max_address_in_flight, in_flight[address]
+                        )
+                    time.sleep(service * rng.uniform(0.8, 1.2))
+                    with lock:
+                        in_flight[user] -= 1
+                        in_flight[address] -= 1
+                with lock:
+                    admitted.append(time.monotonic() - started)
+            except AdmissionRejected as e:
+                with lock:
+                    rejected.append(time.monotonic() - started)
+                    statuses[e.status_code] = statuses.get(e.status_code, 0) + 1
+                    if e.retry_after < 1:
+                        missing_retry_after += 1
+                # A well-behaved client backs off briefly before retrying
+                time.sleep(rng.uniform(0.01, 0.05))
+
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        for i in range(args.clients):
+            pool.submit(client, i)
+
+    bound = (math.ceil(args.max_queue / args.max_concurrent) + 1) * service * 1.2
+    admitted_p99 = _p(admitted, 99)
+    rejected_p99 = _p(rejected, 99)
+    metrics = controller.metrics()
+
+    print(f"admitted: {len(admitted)}  p50 {_p(admitted, 50) * 1000:.0f} ms"
+          f"  p99 {admitted_p99 * 1000:.0f} ms  (bound {bound * 1000:.0f} ms)")
+    print(f"rejected: {len(rejected)}  p99 {rejected_p99 * 1000:.1f} ms  by status {statuses}")
+    print(f"max in flight for one user: {max_user_in_flight} (limit {args.per_user_limit}),"
+          f" one address: {max_address_in_flight} (limit {args.per_address_limit})")
+    print(f"metrics: {metrics}")
+
+    failures = []
+    if admitted_p99 > bound:
+        failures.append("admitted p99 latency exceeded the queue bound")
+    if rejected_p99 > 0.05:
+        failures.append("rejections were not fast")
+    if missing_retry_after:
+        failures.append("some rejections had no Retry-After")
+    if max_user_in_flight > args.per_user_limit:
+        failures.append("a user exceeded the per-user limit")
+    if max_address_in_flight > args.per_address_limit:
+        failures.append("an address exceeded the per-address limit")
+    if metrics["peak_queued"] < args.max_queue:
+        failures.append("the wait queue never filled; address limits rejected first")
+    if not rejected:
+        failures.append("load never exceeded capacity; raise --clients")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
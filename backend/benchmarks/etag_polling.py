@@ -0,0 +1,138 @@
+"""Measure app polling of the exercise list and user endpoints.
+
+Creates a user with many analyzed exercises in a temporary SQLite
+database, then polls GET /api/exercises/{id} and GET /api/users/{id} the
+way the app does on every screen focus: once unconditionally and then
+with If-None-Match. Reports latency, bytes on the wire and SQL statements
+that touch the exercise tables for each case. It then creates, analyzes,
+re-scores (as scripts/rescore.py writes a batch) and deletes exercises and
+checks that every change invalidates the ETag.
+
+Exits non-zero if a 304 touches the exercise tables, or if a stale ETag is
+answered with 304.
+
+Usage (from backend/):
+    python benchmarks/etag_polling.py [--exercises N] [--polls N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'poll.sqlite')}"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from scripts.rescore import _write_chunk  # noqa: E402
+
+EXERCISE_TABLES = ("exercises", "analysis_results")
+statements: list[str] = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _record(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+def _poll(client, url: str, polls: int, headers: dict) -> tuple[float, int, int, int]:
+    """Return (median ms, wire bytes, status, exercise-table statements)."""
+    times = []
+    for _ in range(polls):
+        statements.clear()
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        times.append((time.perf_counter() - started) * 1000)
+    touched = sum(
+        any(table in s for table in EXERCISE_TABLES) for s in statements
+    )
+    return statistics.median(times), response.num_bytes_downloaded, response.status_code, touched
+
+
+def _rescore(result_id: str) -> None:
+    db = SessionLocal()
+    try:
+        _write_chunk(db, [{"id": result_id, "score": 64, "category_scores": {"depth": 0.6}}])
+    finally:
+        db.close()
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exercises", type=int, default=200)
+    parser.add_argument("--polls", type=int, default=50)
+    args = parser.parse_args()
+
+    failures = []
+    user_id = "poller"
+    with TestClient(main.app) as client:
+        client.post("/api/users", json={"cognito_user_id": user_id, "email": "p@example.com"})
+        for i in range(args.exercises):
+            exercise = client.post("/api/exercises", json={
+                "cognito_user_id": user_id, "name": "Back Squat", "category": "legs",
+                "video_url": f"https://videos.example/{i}.mp4",
+            }).json()
+            client.post(f"/api/exercises/{exercise['id']}/analysis", json={
+                "exercise_id": exercise["id"], "score": 70 + i % 30,
+                "feedback": ["Detected 4 rep(s)", "Nearly parallel — try to go slightly deeper"],
+                "key_points": [{"timestamp": 2.4, "issue": "Knees caving inward", "severity": "high"}],
+                "category_scores": {"depth": 0.7, "knee": 0.4}, "analyzer_version": "squat-2",
+            })
+
+        for url in (f"/api/exercises/{user_id}", f"/api/users/{user_id}"):
+            first = client.get(url, headers={"Accept-Encoding": "identity"})
+            etag = first.headers["etag"]
+            cases = {
+                "full": {"Accept-Encoding": "identity"},
+                "gzip": {"Accept-Encoding": "gzip"},
+                "If-None-Match": {"Accept-Encoding": "gzip", "If-None-Match": etag},
+            }
+            print(url)
+            for name, headers in cases.items():
+                ms, size, status, touched = _poll(client, url, args.polls, headers)
+                print(f"  {name:>13}: {status}  {ms:6.2f} ms  {size:>7} B"
+                      f"  exercise-table queries {touched}")
+                if name == "If-None-Match" and (status != 304 or touched):
+                    failures.append(f"{url}: conditional poll was {status} and ran {touched} exercise queries")
+
+        # Every kind of change must invalidate the list's ETag
+        url = f"/api/exercises/{user_id}"
+        etag = client.get(url).headers["etag"]
+        exercise = client.post("/api/exercises", json={
+            "cognito_user_id": user_id, "name": "Front Squat", "category": "legs",
+        }).json()
+        results = []
+        changes = [
+            ("create_exercise", lambda: None),
+            ("save_analysis_result", lambda: results.append(client.post(
+                f"/api/exercises/{exercise['id']}/analysis",
+                json={"exercise_id": exercise["id"], "score": 50, "feedback": [], "key_points": []},
+            ).json()["id"])),
+            ("rescore", lambda: _rescore(results[-1])),
+            ("delete_exercise", lambda: client.delete(
+                f"/api/exercises/{exercise['id']}", params={"cognito_user_id": user_id}
+            )),
+        ]
+        for name, change in changes:
+            change()
+            response = client.get(url, headers={"If-None-Match": etag})
+            if response.status_code != 200 or response.headers["etag"] == etag:
+                failures.append(f"{name} did not invalidate the ETag")
+            etag = response.headers["etag"]
+        print(f"ETag invalidated by create/analyze/rescore/delete: {not failures}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,141 @@
+"""Check that scripts/export.py runs in constant memory.
+
+Builds SQLite databases with increasing numbers of analysis results (one
+exercise per result, three key points each), exports every dataset from
+each in a fresh process, and compares the exporter's peak RSS across sizes.
+For contrast it also measures loading the same results through the ORM
+the way the API does.
+
+Exits non-zero if export peak RSS grows by more than --max-growth-mb
+between the smallest and largest database, or if the exported row counts
+are wrong.
+
+Usage (from backend/):
+    python benchmarks/export_memory.py [--sizes 20000 200000] [--format parquet]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ORM_LOAD = (
+    "from database import SessionLocal; from models.db_models import AnalysisResult; "
+    "db = SessionLocal(); print(len(db.query(AnalysisResult).all()))"
+)
+
+
+def _populate(url: str, results: int) -> None:
+    os.environ["DATABASE_URL"] = url
+    sys.path.insert(0, BACKEND)
+    from sqlalchemy import create_engine, insert
+
+    from models.db_models import AnalysisResult, Base, Exercise, User
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    users = [
+        {"id": str(uuid.uuid4()), "cognito_user_id": f"user-{i}", "email": f"u{i}@example.com"}
+        for i in range(max(1, results // 100))
+    ]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    key_points = [
+        {"timestamp": 1.2, "issue": "Nearly parallel — try to go slightly deeper", "severity": "medium"},
+        {"timestamp": 3.4, "issue": "Knees caving inward", "severity": "high"},
+        {"timestamp": 5.6, "issue": "Excessive forward lean", "severity": "medium"},
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(User), users)
+        for offset in range(0, results, 10_000):
+            exercises, analyses = [], []
+            for i in range(offset, min(results, offset + 10_000)):
+                exercise_id = str(uuid.uuid4())
+                when = start + timedelta(minutes=i)
+                exercises.append({
+                    "id": exercise_id, "user_id": users[i % len(users)]["id"],
+                    "name": "Back Squat", "category": "legs", "created_at": when,
+                })
+                analyses.append({
+                    "id": str(uuid.uuid4()), "exercise_id": exercise_id, "score": i % 100,
+                    "feedback": ["Good depth — hips below parallel", "Knees caving inward"],
+                    "key_points": key_points,
+                    "category_scores": {"depth": 1.0, "knee": 0.4, "torso": 0.7},
+                    "analyzer_version": "squat-2", "analyzed_at": when,
+                })
+            conn.execute(insert(Exercise), exercises)
+            conn.execute(insert(AnalysisResult), analyses)
+
+
+def _run(args: list[str], url: str) -> tuple[float, float, str]:
+    """Run a backend process; return (peak RSS MB, seconds, stdout)."""
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, *args], cwd=BACKEND, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        env={**os.environ, "DATABASE_URL": url},
+    )
+    _, status, usage = os.wait4(proc.pid, 0)
+    out = proc.stdout.read().decode()
+    if status != 0:
+        raise SystemExit(proc.stderr.read().decode())
+    return usage.ru_maxrss / 1024, time.monotonic() - started, out
+
+
+def _count_rows(path: str, fmt: str) -> int:
+    if fmt == "csv":
+        with open(path, newline="") as f:
+            return sum(1 for _ in csv.reader(f)) - 1
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000])
+    parser.add_argument("--format", choices=["csv", "parquet"], default="parquet")
+    parser.add_argument("--max-growth-mb", type=float, default=30)
+    args = parser.parse_args()
+
+    failures = []
+    peaks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            url = f"sqlite:///{os.path.join(tmp, f'{size}.sqlite')}"
+            _populate(url, size)
+            out_dir = os.path.join(tmp, f"export-{size}")
+            rss, seconds, _ = _run(
+                ["-m", "scripts.export", "--out-dir", out_dir, "--format", args.format], url
+            )
+            orm_rss, orm_seconds, _ = _run(["-c", ORM_LOAD], url)
+            peaks.append(rss)
+
+            expected = {"analysis_results": size, "key_points": 3 * size, "exercises": size}
+            for dataset, rows in expected.items():
+                got = _count_rows(os.path.join(out_dir, f"{dataset}.{args.format}"), args.format)
+                if got != rows:
+                    failures.append(f"{size}: {dataset} has {got} rows, expected {rows}")
+            total_mb = sum(
+                os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir)
+            ) / 1e6
+            print(f"{size:>9} results: export peak RSS {rss:6.0f} MB in {seconds:5.1f}s"
+                  f" ({total_mb:.1f} MB written) | ORM load {orm_rss:6.0f} MB in {orm_seconds:5.1f}s")
+
+    growth = peaks[-1] - peaks[0]
+    print(f"export RSS growth from {args.sizes[0]} to {args.sizes[-1]} results: {growth:.0f} MB")
+    if growth > args.max_growth_mb:
+        failures.append(f"export memory grew by {growth:.0f} MB")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measure API cold start and guard against heavy imports creeping back in.
+
+Imports main.py and runs the startup hook in fresh interpreters, reporting
+import time and peak RSS. Exits non-zero if mediapipe or OpenCV got loaded,
+or if the median cold start exceeds --budget-ms.
+
+Usage (from backend/):
+    python benchmarks/import_time.py [--runs N] [--budget-ms MS]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("mediapipe", "cv2", "tensorflow", "torch")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.startup()
+main.health_check()
+ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - started) * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _probe() -> dict:
+    env = dict(os.environ)
+    # Keep the benchmark from touching the real database
+    env.setdefault("DATABASE_URL", "sqlite://")
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    results = [_probe() for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    startup_ms = statistics.median(r["startup_ms"] for r in results)
+    rss_mb = max(r["max_rss_mb"] for r in results)
+    heavy = sorted({m for r in results for m in r["heavy"]})
+
+    print(f"import main:      {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"import + startup: {startup_ms:8.1f} ms")
+    print(f"peak RSS:         {rss_mb:8.1f} MB")
+    print(f"heavy modules:    {', '.join(heavy) or 'none'}")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: CRUD startup loaded {', '.join(heavy)}")
+        failed = True
+    if args.budget_ms is not None and startup_ms > args.budget_ms:
+        print(f"FAIL: startup {startup_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Compare on-device landmark upload with the video analysis path.
+
+Synthesizes squat sets (see smoothing_stability.py), renders each one as a
+720p stick-figure video and encodes its landmarks with
+services/landmark_codec. Reports, per set:
+- upload bytes: mp4 vs encoded landmarks (raw and zlib)
+- server CPU seconds: download-free video path (decode + pose estimation
+  + analysis) vs decode_landmarks + analysis
+- whether the score from the decoded series matches the unquantized one
+
+Also feeds the decoder malformed and oversized inputs and checks each is
+rejected, and measures peak memory while analyzing the largest accepted
+upload (MAX_FRAMES frames at 60 fps). Exits non-zero if scores differ, a
+bad input is accepted or the peak exceeds --max-peak-mb.
+
+Usage (from backend/):
+    python benchmarks/landmark_ingestion.py [--sets N] [--skip-video]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(BACKEND, "benchmarks"))
+
+from analyzers import analyze, find_analyzer  # noqa: E402
+from analyzers.features import PoseFeatures  # noqa: E402
+from analyzers.landmarks import NUM_LANDMARKS  # noqa: E402
+from services.landmark_codec import (  # noqa: E402
+    MAX_FRAMES,
+    MIN_FRAME_INTERVAL_MS,
+    LandmarkFormatError,
+    decode_landmarks,
+    encode_landmarks,
+    to_pose_data,
+)
+from smoothing_stability import _add_noise, _synthesize  # noqa: E402
+
+WIDTH, HEIGHT = 1280, 720
+SKELETON = [(11, 12), (11, 23), (12, 24), (23, 24), (23, 25), (24, 26),
+            (25, 27), (26, 28), (27, 31), (28, 32)]
+
+
+def _render(timestamps: np.ndarray, points: np.ndarray, path: str) -> None:
+    import cv2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (WIDTH, HEIGHT))
+    for frame_points in points:
+        frame = np.full((HEIGHT, WIDTH, 3), 90, dtype=np.uint8)
+        xy = (frame_points[:, :2] * [WIDTH, HEIGHT]).astype(int)
+        for a, b in SKELETON:
+            cv2.line(frame, tuple(xy[a]), tuple(xy[b]), (230, 200, 180), 18)
+        cv2.circle(frame, tuple(xy[11] + [0, -60]), 45, (230, 200, 180), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def _video_path_cpu(path: str, spec) -> float:
+    from services.pose import PoseEstimator
+    from services.video import iter_frames
+
+    started = time.process_time()
+    estimator = PoseEstimator()
+    try:
+        pose_data = estimator.process_frames(iter_frames(path, 5))
+    finally:
+        estimator.close()
+    if pose_data:
+        analyze(spec, pose_data)
+    return time.process_time() - started
+
+
+def _landmark_path(body: bytes, spec) -> tuple[float, int]:
+    started = time.process_time()
+    timestamps, points = decode_landmarks(body)
+    result = analyze(
+        spec, to_pose_data(timestamps, points), PoseFeatures.from_arrays(timestamps, points)
+    )
+    return time.process_time() - started, result.score
+
+
+def _bad_inputs(good: bytes) -> dict[str, bytes]:
+    header = good[:12]
+    magic, version, flags, count, reserved, frames = struct.unpack("<4sBBBBI", header)
+    bomb = zlib.compress(b"\0" * 50_000_000)
+    return {
+        "empty": b"",
+        "truncated": good[: len(good) // 2],
+        "bad magic": b"XXXX" + good[4:],
+        "bad version": good[:4] + bytes([9]) + good[5:],
+        "unknown flag": good[:5] + bytes([flags | 0x80]) + good[6:],
+        "wrong landmark count": good[:6] + bytes([17]) + good[7:],
+        "too many frames": struct.pack("<4sBBBBI", magic, version, flags, count, 0,
+                                       MAX_FRAMES + 1) + good[12:],
+        "trailing bytes": good + b"\0",
+        "zip bomb": struct.pack("<4sBBBBI", magic, version, 1, count, 0, 10) + bomb,
+        "decreasing timestamps": encode_landmarks(
+            np.array([0.2, 0.1]), np.zeros((2, NUM_LANDMARKS, 3))
+        ),
+        "frames 1 ms apart": encode_landmarks(
+            np.arange(MAX_FRAMES) / 1000, np.zeros((MAX_FRAMES, NUM_LANDMARKS, 3))
+        ),
+    }
+
+
+def _largest_upload_peak_mb(spec, rng: np.random.Generator) -> float:
+    """Peak traced memory analyzing MAX_FRAMES frames at the tightest spacing."""
+    timestamps, points = [], []
+    while sum(map(len, timestamps)) < MAX_FRAMES:
+        t, p = _synthesize(rng)
+        timestamps.append(t)
+        points.append(p)
+    points = np.concatenate(points)[:MAX_FRAMES]
+    timestamps = np.arange(MAX_FRAMES) * MIN_FRAME_INTERVAL_MS / 1000
+    body = encode_landmarks(timestamps, points)
+
+    tracemalloc.start()
+    try:
+        _landmark_path(body, spec)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets", type=int, default=5)
+    parser.add_argument("--fps", type=int, default=5,
+                        help="rate the client samples landmarks at (the video path uses 5)")
+    parser.add_argument("--skip-video", action="store_true",
+                        help="don't render and re-infer videos (no mediapipe needed)")
+    parser.add_argument("--max-peak-mb", type=float, default=400)
+    args = parser.parse_args()
+
+    spec = find_analyzer("squat")
+    rng = np.random.default_rng(7)
+    stride = max(1, round(30 / args.fps))
+    failures = []
+    video_bytes, raw_bytes, zlib_bytes = [], [], []
+    video_cpu, landmark_cpu = [], []
+
+    for i in range(args.sets):
+        timestamps, points = _synthesize(rng)
+        noisy = _add_noise(points, rng)
+        sampled_t, sampled_p = timestamps[::stride], noisy[::stride]
+
+        body = encode_landmarks(sampled_t, sampled_p)
+        raw_bytes.append(len(encode_landmarks(sampled_t, sampled_p, compress=False)))
+        zlib_bytes.append(len(body))
+
+        cpu, score = _landmark_path(body, spec)
+        landmark_cpu.append(cpu)
+        reference = analyze(
+            spec, to_pose_data(sampled_t, sampled_p), PoseFeatures.from_arrays(sampled_t, sampled_p)
+        ).score
+        if score != reference:
+            failures.append(f"set {i}: decoded score {score} != unquantized {reference}")
+
+        if not args.skip_video:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "set.mp4")
+                _render(timestamps, points, path)
+                video_bytes.append(os.path.getsize(path))
+                video_cpu.append(_video_path_cpu(path, spec))
+
+        print(f"set {i}: {len(sampled_t)} frames, landmarks {zlib_bytes[-1] / 1024:.1f} KB"
+              + (f", video {video_bytes[-1] / 1024:.0f} KB" if video_bytes else "")
+              + f", score {score}")
+
+    print()
+    print(f"landmarks upload: raw {statistics.mean(raw_bytes) / 1024:.1f} KB,"
+          f" zlib {statistics.mean(zlib_bytes) / 1024:.1f} KB (mean)")
+    print(f"landmark path CPU: {statistics.mean(landmark_cpu) * 1000:.1f} ms (mean)")
+    if video_bytes:
+        print(f"video upload: {statistics.mean(video_bytes) / 1024:.0f} KB (mean)")
+        print(f"video path CPU: {statistics.mean(video_cpu) * 1000:.0f} ms (mean),"
+              f" {statistics.mean(video_cpu) / statistics.mean(landmark_cpu):.0f}x the landmark path")
+
+    bad_inputs = _bad_inputs(encode_landmarks(sampled_t, sampled_p))
+    accepted = []
+    for name, data in bad_inputs.items():
+        try:
+            decode_landmarks(data)
+            accepted.append(name)
+        except LandmarkFormatError:
+            pass
+    print(f"malformed inputs rejected: {len(bad_inputs) - len(accepted)}/{len(bad_inputs)}")
+    failures.extend(f"accepted malformed input: {name}" for name in accepted)
+
+    peak_mb = _largest_upload_peak_mb(spec, rng)
+    print(f"peak memory for a {MAX_FRAMES}-frame 60 fps upload: {peak_mb:.0f} MB")
+    if peak_mb > args.max_peak_mb:
+        failures.append(f"largest upload peaked at {peak_mb:.0f} MB")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
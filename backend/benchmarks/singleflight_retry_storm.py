@@ -0,0 +1,159 @@
+"""Measure duplicate work under a retry storm on /api/analyze.
+
+Sends bursts of identical analyze requests (as mobile retries and
+double-taps do) concurrently through main.analyze_form, with the video
+download and pose estimation replaced by stubs that count how often they
+run. One of the videos fails to download, to check that the error reaches
+every duplicate that joined it.
+
+Only max_waiters duplicates may wait on a running analysis (each holds a
+threadpool worker); the rest must be turned away at once with 429 and a
+Retry-After. Compares the number of downloads with the number of distinct
+requests and checks every temp file was removed. Exits non-zero on
+duplicate work, a wrong status or waiter count, a slow or bare 429, or a
+leaked temp file.
+
+Usage (from backend/):
+    python benchmarks/singleflight_retry_storm.py [--videos N] [--retries N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import HTTPException  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+import main  # noqa: E402
+from models.schemas import AnalyzeRequest  # noqa: E402
+
+FAILING_URL = "https://videos.example/broken.mp4"
+
+_lock = threading.Lock()
+downloads = 0
+temp_files: list[str] = []
+
+
+def _download(video_url: str, work_s: float) -> str:
+    global downloads
+    with _lock:
+        downloads += 1
+    time.sleep(work_s)
+    if video_url == FAILING_URL:
+        raise ValueError("simulated download failure")
+    tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+    tmp.close()
+    with _lock:
+        temp_files.append(tmp.name)
+    return tmp.name
+
+
+class _StubEstimator:
+    """Stands in for PoseEstimator; returns a short standing pose series."""
+
+    def __init__(self, model_complexity: int = 1):
+        self.frames_processed = 0
+        self.inference_seconds = 0.0
+        self.stopped_at = None
+
+    def process_frames(self, frames, deadline=None):
+        self.frames_processed = 10
+        return [(i / 5, {j: (0.5, 0.5, 1.0) for j in range(33)}) for i in range(10)]
+
+    def close(self):
+        pass
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=5)
+    parser.add_argument("--retries", type=int, default=20)
+    parser.add_argument("--work-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    work_s = args.work_ms / 1000
+    main.download_video = lambda url, deadline=None: _download(url, work_s)
+    main.probe_video = lambda path: {
+        "fps": 30.0, "frame_count": 60, "width": 640, "height": 360, "duration": 2.0
+    }
+    main.iter_frames = lambda *a, **kw: iter(())
+    main.PoseEstimator = _StubEstimator
+    # Retries shouldn't be throttled by admission control in this benchmark
+    main.analysis_admission.max_concurrent = args.videos + 1
+    main.analysis_admission.per_user_limit = args.videos + 1
+
+    urls = [f"https://videos.example/{i}.mp4" for i in range(args.videos - 1)]
+    urls.append(FAILING_URL)
+    http_request = Request({"type": "http", "client": ("10.0.0.1", 0), "headers": []})
+
+    turned_away: list[float] = []
+
+    def send(url: str) -> int:
+        request = AnalyzeRequest(
+            video_url=url, exercise_name="Back Squat", cognito_user_id="storm"
+        )
+        sent = time.monotonic()
+        try:
+            main.analyze_form(request, http_request, db=None)
+            return 200
+        except HTTPException as e:
+            if e.status_code == 429:
+                with _lock:
+                    turned_away.append(time.monotonic() - sent)
+                if int((e.headers or {}).get("Retry-After", 0)) < 1:
+                    return -1
+            return e.status_code
+
+    jobs = [url for url in urls for _ in range(args.retries)]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        statuses = list(pool.map(send, jobs))
+    elapsed = time.monotonic() - started
+
+    by_url: dict[str, list[int]] = {}
+    for url, status in zip(jobs, statuses):
+        by_url.setdefault(url, []).append(status)
+    served = 1 + min(main.analysis_flights.max_waiters, args.retries - 1)
+    leaked = [path for path in temp_files if os.path.exists(path)]
+
+    print(f"requests: {len(jobs)} ({args.videos} videos x {args.retries} retries)"
+          f" in {elapsed:.2f}s")
+    print(f"downloads + pose runs: {downloads} (without coalescing: {len(jobs)})")
+    print(f"duplicate work: {downloads - args.videos}")
+    print(f"statuses per video: { {u.rsplit('/', 1)[-1]: sorted(set(s)) for u, s in by_url.items()} }")
+    print(f"served per video: {served} (1 + max_waiters), turned away: {len(turned_away)},"
+          f" slowest 429 {max(turned_away, default=0) * 1000:.1f} ms")
+    print(f"leaked temp files: {len(leaked)}")
+    print(f"metrics: {main.analysis_flights.metrics()}")
+
+    failures = []
+    if downloads != args.videos:
+        failures.append("duplicate requests repeated the work")
+    if by_url[FAILING_URL].count(500) != served or set(by_url[FAILING_URL]) - {500, 429}:
+        failures.append("the failure didn't reach every waiting duplicate")
+    if any(
+        by_url[url].count(200) != served or set(by_url[url]) - {200, 429}
+        for url in urls[:-1]
+    ):
+        failures.append("a successful analysis didn't reach exactly the waiting duplicates")
+    if -1 in statuses:
+        failures.append("a 429 had no Retry-After")
+    if max(turned_away, default=0) > 0.05:
+        failures.append("turning duplicates away was not immediate")
+    if leaked:
+        failures.append("temp files were left behind")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    run()
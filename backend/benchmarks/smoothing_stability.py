@@ -0,0 +1,153 @@
+"""Check that landmark smoothing keeps squat scores stable at lower sampling rates.
+
+Synthesizes squat sets with known form from a simple 2D body model, adds
+MediaPipe-like jitter and occlusions (low visibility, larger error), then
+samples them the way extract_frames does at several fps. Each sample is
+scored with and without smoothing and compared with the score of the
+clean 30 fps series.
+
+Usage (from backend/):
+    python benchmarks/smoothing_stability.py [--trials N] [--fps 3 4 5]
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import statistics
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzers.features import PoseFeatures  # noqa: E402
+from analyzers.landmarks import (  # noqa: E402
+    NUM_LANDMARKS,
+    L_SHOULDER,
+    R_SHOULDER,
+    L_HIP,
+    R_HIP,
+    L_KNEE,
+    R_KNEE,
+    L_ANKLE,
+    R_ANKLE,
+    L_FOOT,
+    R_FOOT,
+)
+from analyzers.squat import analyze_squat  # noqa: E402
+
+VIDEO_FPS = 30.0
+BASELINE_FPS = 5
+SHIN = THIGH = 0.2
+TORSO = 0.3
+
+
+def _synthesize(rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """Return (timestamps, points) for a clean 30 fps squat set."""
+    reps = int(rng.integers(2, 6))
+    period = rng.uniform(2.0, 4.0)
+    pause = rng.uniform(0.3, 1.0)
+    min_knee = rng.uniform(75, 120)
+    max_lean = rng.uniform(10, 55)
+    valgus = rng.uniform(0.0, 0.06)
+
+    duration = reps * (period + pause) + 1.0
+    timestamps = np.arange(0, duration, 1 / VIDEO_FPS)
+    phase = (timestamps % (period + pause)) / period
+    bend = np.where(
+        (phase < 1) & (timestamps < reps * (period + pause)),
+        0.5 - 0.5 * np.cos(2 * math.pi * np.minimum(phase, 1)),
+        0.0,
+    )
+
+    knee = np.radians(178 - (178 - min_knee) * bend)
+    lean = np.radians(5 + (max_lean - 5) * bend)
+    points = np.zeros((len(timestamps), NUM_LANDMARKS, 3))
+    points[:, :, :2] = 0.5
+    points[:, :, 2] = 1.0
+
+    for side, x, inward in ((0, 0.45, 1), (1, 0.55, -1)):
+        sh, hp, kn, an, ft = (
+            (L_SHOULDER, L_HIP, L_KNEE, L_ANKLE, L_FOOT)
+            if side == 0
+            else (R_SHOULDER, R_HIP, R_KNEE, R_ANKLE, R_FOOT)
+        )
+        ankle = np.stack([np.full_like(bend, x), np.full_like(bend, 0.9)], axis=1)
+        knee_xy = ankle + np.stack(
+            [inward * valgus * bend, np.full_like(bend, -SHIN)], axis=1
+        )
+        thigh = math.pi - knee
+        hip_xy = knee_xy + THIGH * np.stack([-np.sin(thigh), -np.cos(thigh)], axis=1)
+        shoulder_xy = hip_xy + TORSO * np.stack([np.sin(lean), -np.cos(lean)], axis=1)
+        foot_xy = ankle + np.array([0.0, 0.02])
+        for idx, xy in ((sh, shoulder_xy), (hp, hip_xy), (kn, knee_xy), (an, ankle), (ft, foot_xy)):
+            points[:, idx, :2] = xy
+
+    return timestamps, points
+
+
+def _add_noise(points: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """MediaPipe-like jitter; occluded points get low visibility and 4x error."""
+    noisy = points.copy()
+    occluded = rng.random(points.shape[:2]) < 0.12
+    sigma = np.where(occluded, 0.03, 0.0075)
+    noisy[:, :, :2] += rng.normal(size=points.shape[:2] + (2,)) * sigma[..., None]
+    noisy[:, :, 2] = np.where(
+        occluded, rng.uniform(0.1, 0.4, occluded.shape), rng.uniform(0.85, 1.0, occluded.shape)
+    )
+    return noisy
+
+
+def _sample(timestamps: np.ndarray, points: np.ndarray, fps: int) -> list:
+    """Pick frames like services/video.extract_frames."""
+    interval = max(1, int(VIDEO_FPS / fps))
+    return [
+        (float(timestamps[i]), {j: tuple(points[i, j]) for j in range(NUM_LANDMARKS)})
+        for i in range(0, len(timestamps), interval)
+    ]
+
+
+def _score(pose_data: list, smooth: bool) -> int:
+    return analyze_squat(pose_data, PoseFeatures.from_pose_data(pose_data, smooth)).score
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--fps", type=int, nargs="+", default=[2, 3, 4, 5])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    errors: dict[tuple[int, bool], list[int]] = {}
+    for _ in range(args.trials):
+        timestamps, clean = _synthesize(rng)
+        truth = _score(_sample(timestamps, clean, int(VIDEO_FPS)), smooth=False)
+        noisy = _add_noise(clean, rng)
+        for fps in args.fps:
+            pose_data = _sample(timestamps, noisy, fps)
+            for smooth in (False, True):
+                errors.setdefault((fps, smooth), []).append(
+                    abs(_score(pose_data, smooth) - truth)
+                )
+
+    baseline = errors[(BASELINE_FPS, False)] if BASELINE_FPS in args.fps else None
+    print(f"{'fps':>4} {'smoothed':>9} {'mean |err|':>11} {'p90 |err|':>10} {'>10 pts':>8}")
+    for (fps, smooth), errs in sorted(errors.items()):
+        p90 = statistics.quantiles(errs, n=10)[-1]
+        bad = sum(e > 10 for e in errs) / len(errs)
+        marker = "  <- today" if (fps, smooth) == (BASELINE_FPS, False) else ""
+        print(f"{fps:>4} {str(smooth):>9} {statistics.mean(errs):>11.2f} {p90:>10.1f} {bad:>8.1%}{marker}")
+
+    if baseline is not None:
+        ok = [
+            fps
+            for fps in args.fps
+            if statistics.mean(errors[(fps, True)]) <= statistics.mean(baseline)
+        ]
+        print(f"Smoothed rates at least as accurate as unsmoothed {BASELINE_FPS} fps: {ok}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Check the analysis timeline's shape fidelity and payload bound.
+
+Builds squat sessions of increasing length by chaining synthetic sets (see
+smoothing_stability.py), analyzes each with a timeline at the requested
+point budget, and reports:
+- timeline JSON size against the full per-frame series
+- mean and worst error of the chart (linear interpolation of the samples)
+  against the full knee/hip/torso series, for the LTTB timeline and for
+  evenly spaced samples plus the same rep markers at the same budget
+- how far the charted depth of each listed rep is from the true minimum
+
+Exits non-zero if a listed rep's marker is not a sample, the sample count
+exceeds the budget, a short session doesn't list every rep, or LTTB has a
+larger mean error than the even baseline while it had points left to place
+after the markers.
+
+Usage (from backend/):
+    python benchmarks/timeline_downsampling.py [--points 200] [--minutes 1 5 20]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.join(BACKEND, "benchmarks"))
+
+from analyzers import analyze, find_analyzer  # noqa: E402
+from analyzers.features import PoseFeatures  # noqa: E402
+from analyzers.squat import TIMELINE_ANGLES, detect_reps  # noqa: E402
+from models.schemas import MAX_TIMELINE_POINTS  # noqa: E402
+from services.landmark_codec import to_pose_data  # noqa: E402
+from smoothing_stability import _add_noise, _synthesize  # noqa: E402
+
+
+def _session(rng: np.random.Generator, minutes: float, fps: int):
+    """Chain synthetic sets until the session lasts the given minutes."""
+    stride = max(1, round(30 / fps))
+    ts, ps, offset = [], [], 0.0
+    while offset < minutes * 60:
+        t, p = _synthesize(rng)
+        p = _add_noise(p, rng)
+        ts.append(t[::stride] + offset)
+        ps.append(p[::stride])
+        offset = ts[-1][-1] + 1 / fps
+    return np.concatenate(ts), np.concatenate(ps)
+
+
+def _chart_error(x, full: dict, sample_x, sample_ys: dict) -> tuple[float, float]:
+    """Mean and worst gap between the charted and full series over all angles."""
+    gaps = np.concatenate([
+        np.abs(np.interp(x, sample_x, sample_ys[k]) - full[k]) for k in full
+    ])
+    return float(gaps.mean()), float(gaps.max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=200)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--fps", type=int, default=5)
+    args = parser.parse_args()
+
+    spec = find_analyzer("squat")
+    rng = np.random.default_rng(11)
+    failures = []
+
+    for minutes in args.minutes:
+        timestamps, points = _session(rng, minutes, args.fps)
+        pose_data = to_pose_data(timestamps, points)
+        features = PoseFeatures.from_arrays(timestamps, points)
+        result = analyze(spec, pose_data, features, timeline_points=args.points)
+        timeline = result.timeline
+        detected = detect_reps(pose_data, features)
+        # The reps the timeline lists; long sessions list only those that fit
+        listed = {(r.start, r.bottom, r.end) for r in timeline.reps}
+        reps = [
+            r for r in detected
+            if tuple(round(float(timestamps[r[k]]), 3)
+                     for k in ("start_index", "bottom_index", "end_index")) in listed
+        ]
+
+        full = {name: features.get(name) for name in TIMELINE_ANGLES}
+        full_bytes = len(json.dumps({
+            "timestamps": np.round(timestamps, 3).tolist(),
+            **{k: np.round(v, 1).tolist() for k, v in full.items()},
+        }))
+        timeline_bytes = len(timeline.model_dump_json())
+
+        samples = np.array(timeline.timestamps)
+        marker_idx = [r[k] for r in reps for k in ("start_index", "bottom_index", "end_index")]
+        # Baseline under the same constraint: evenly spaced frames plus the markers
+        uniform = np.union1d(
+            np.linspace(0, len(timestamps) - 1, max(2, len(samples) - len(set(marker_idx))))
+            .astype(int),
+            marker_idx,
+        )
+        lttb_mean, lttb_worst = _chart_error(
+            timestamps, full, samples, {k: np.array(v) for k, v in timeline.angles.items()}
+        )
+        uniform_mean, uniform_worst = _chart_error(
+            timestamps, full, timestamps[uniform], {k: v[uniform] for k, v in full.items()}
+        )
+        # Depth the chart shows in each rep, against the true minimum
+        knee = np.array(timeline.angles["knee_angle"])
+        depth_err = max(
+            (abs(knee[(samples >= timestamps[r["start_index"]] - 1e-3)
+                      & (samples <= timestamps[r["end_index"]] + 1e-3)].min()
+                 - full["knee_angle"][r["start_index"]:r["end_index"] + 1].min())
+             for r in reps),
+            default=0.0,
+        )
+        print(f"{minutes:>5g} min, {len(timestamps)} frames,"
+              f" {len(reps)}/{len(detected)} reps listed:"
+              f" {len(samples)} samples, {timeline_bytes / 1024:.1f} KB"
+              f" (full series {full_bytes / 1024:.0f} KB)")
+        print(f"        chart error mean/worst: LTTB {lttb_mean:.2f}/{lttb_worst:.1f} deg,"
+              f" uniform {uniform_mean:.2f}/{uniform_worst:.1f} deg;"
+              f" rep depth error: LTTB {depth_err:.2f} deg")
+
+        markers = {t for r in timeline.reps for t in (r.start, r.bottom, r.end)}
+        if not markers <= set(timeline.timestamps):
+            failures.append(f"{minutes} min: listed rep markers missing from the samples")
+        if len(reps) != len(timeline.reps):
+            failures.append(f"{minutes} min: listed reps don't match detected reps")
+        if len(samples) > min(args.points, MAX_TIMELINE_POINTS):
+            failures.append(f"{minutes} min: {len(samples)} samples for a budget of {args.points}")
+        if 3 * len(detected) + 2 <= args.points and len(reps) < len(detected):
+            failures.append(f"{minutes} min: reps dropped though they fit the budget")
+        free = len(samples) - len(set(marker_idx) | {0, len(timestamps) - 1})
+        if free > 0 and lttb_mean > uniform_mean:
+            failures.append(f"{minutes} min: LTTB less faithful than uniform decimation")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./reprightdb.sqlite")
@@ -25,3 +25,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def add_missing_columns():
+    """Add nullable columns that exist on the models but not yet in the DB.
+
+    ``create_all`` only creates missing tables, so databases created before a
+    column was introduced (e.g. the bundled SQLite file) would otherwise fail
+    on the first query that selects it.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}")
+                )
@@ -1,14 +1,21 @@
 import os
+import time
 import logging
+from ipaddress import ip_address, ip_network
 
-from fastapi import FastAPI, HTTPException, Depends
+from typing import Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
-from database import engine, get_db
+from database import engine, get_db, add_missing_columns
 from models import db_models
 from models.schemas import (
+    MAX_TIMELINE_POINTS,
     AnalyzeRequest,
     FormAnalysis,
     HealthResponse,
@@ -18,23 +25,70 @@ from models.schemas import (
     ExerciseResponse,
     SaveAnalysisRequest,
     AnalysisResultResponse,
+    ProgressPoint,
 )
-from services.video import download_video, extract_frames
+from services.video import DownloadTimeout, download_video, probe_video, iter_frames
 from services.pose import PoseEstimator
-from services.user import get_or_create_user, get_user_by_cognito_id
+from services.budget import download_deadline, plan_analysis, record_inference
+from services.admission import AdmissionController, AdmissionRejected
+from services.singleflight import SingleFlight, TooManyWaiters
+from services.pose_store import save_pose_series
+from services.landmark_codec import (
+    LandmarkFormatError,
+    decode_landmarks,
+    max_encoded_size,
+    to_pose_data,
+)
+from services.user import get_or_create_user, get_user_by_cognito_id, get_user_version
+from services.http_cache import etag_matches, json_response, make_etag, not_modified
 from services.exercise import (
     create_exercise,
     get_user_exercises,
     delete_exercise,
     save_analysis_result,
 )
-from analyzers.squat import analyze_squat
+from services.progress import get_progress
+from analyzers import analyze, find_analyzer, supported_exercises
+from analyzers.features import PoseFeatures
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Frames sampled per second of video for pose estimation. Landmarks are
+# smoothed before analysis, so rates below 5 stay stable
+# (see benchmarks/smoothing_stability.py).
+ANALYSIS_FPS = int(os.getenv("ANALYSIS_FPS", "5"))
+
+analysis_admission = AdmissionController(
+    max_concurrent=int(os.getenv("ANALYZE_MAX_CONCURRENT", "2")),
+    max_queue=int(os.getenv("ANALYZE_MAX_QUEUE", "8")),
+    per_user_limit=int(os.getenv("ANALYZE_PER_USER_LIMIT", "2")),
+    # Many users can share an address (NAT), so this is well above the
+    # per-user limit while still leaving queue room for other addresses
+    per_address_limit=int(os.getenv("ANALYZE_PER_ADDRESS_LIMIT", "6")),
+    queue_timeout=float(os.getenv("ANALYZE_QUEUE_TIMEOUT_S", "15")),
+)
+
+# Reverse proxies / load balancers (comma-separated addresses or CIDRs)
+# whose X-Forwarded-For is trusted to name the real client
+TRUSTED_PROXIES = [
+    ip_network(entry.strip(), strict=False)
+    for entry in os.getenv("TRUSTED_PROXIES", "").split(",")
+    if entry.strip()
+]
+
+# Identical analyze requests that arrive while one is running share its result.
+# Each waiter holds a threadpool worker until the analysis ends, so only a
+# few may wait per request; with the admission limits above that keeps
+# coalesced waiters well below the threadpool's 40 workers.
+analysis_flights = SingleFlight(
+    max_waiters=int(os.getenv("ANALYZE_MAX_COALESCED_WAITERS", "2"))
+)
+
+_exercise_list = TypeAdapter(list[ExerciseResponse])
+
 app = FastAPI(title="RepRight API")
 
 app.add_middleware(
@@ -49,6 +103,7 @@ app.add_middleware(
 @app.on_event("startup")
 def startup():
     db_models.Base.metadata.create_all(bind=engine)
+    add_missing_columns()
     logger.info("Database tables created/verified")
 
 
@@ -72,11 +127,20 @@ def upsert_user(data: UserCreate, db: Session = Depends(get_db)):
 
 
 @app.get("/api/users/{cognito_user_id}", response_model=UserResponse)
-def get_user(cognito_user_id: str, db: Session = Depends(get_db)):
+def get_user(cognito_user_id: str, request: Request, db: Session = Depends(get_db)):
+    version = get_user_version(db, cognito_user_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    etag = make_etag("user", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     user = get_user_by_cognito_id(db, cognito_user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return json_response(
+        request, UserResponse.model_validate(user).model_dump_json().encode(), etag
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -92,8 +156,22 @@ def add_exercise(data: ExerciseCreate, db: Session = Depends(get_db)):
 
 
 @app.get("/api/exercises/{cognito_user_id}", response_model=list[ExerciseResponse])
-def list_exercises(cognito_user_id: str, db: Session = Depends(get_db)):
-    return get_user_exercises(db, cognito_user_id)
+def list_exercises(
+    cognito_user_id: str, request: Request, db: Session = Depends(get_db)
+):
+    # The version is read before the list, so the ETag is never newer than
+    # the body it is sent with
+    version = get_user_version(db, cognito_user_id)
+    if version is None:
+        return []
+    etag = make_etag("exercises", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    exercises = _exercise_list.validate_python(
+        get_user_exercises(db, cognito_user_id), from_attributes=True
+    )
+    return json_response(request, _exercise_list.dump_json(exercises), etag)
 
 
 @app.delete("/api/exercises/{exercise_id}")
@@ -106,6 +184,21 @@ def remove_exercise(
     return {"status": "deleted"}
 
 
+# ---------------------------------------------------------------------------
+# Progress
+# ---------------------------------------------------------------------------
+
+@app.get("/api/progress/{cognito_user_id}", response_model=list[ProgressPoint])
+def list_progress(
+    cognito_user_id: str,
+    period: Literal["day", "week"] = "week",
+    exercise_type: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Score trends per exercise type, served from the rollup table."""
+    return get_progress(db, cognito_user_id, period, exercise_type)
+
+
 # ---------------------------------------------------------------------------
 # Analysis
 # ---------------------------------------------------------------------------
@@ -118,45 +211,254 @@ def add_analysis(
     return save_analysis_result(db, data)
 
 
+@app.get("/api/metrics/admission")
+def admission_metrics():
+    return analysis_admission.metrics()
+
+
+@app.get("/api/metrics/coalescing")
+def coalescing_metrics():
+    return analysis_flights.metrics()
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def _client_address(request: Request) -> str:
+    """The client's IP, looking through X-Forwarded-For set by trusted proxies.
+
+    Hops are read right to left and the first one that isn't a trusted proxy
+    is the client; anything further left could have been forged by it.
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+    forwarded = request.headers.get("x-forwarded-for", "")
+    for hop in reversed([h.strip() for h in forwarded.split(",") if h.strip()]):
+        host = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return host
+
+
+def _run_admitted(address: str, user_key: Optional[str], fn, *args):
+    """Run fn under an analysis_admission slot, mapping rejections to HTTP."""
+    try:
+        with analysis_admission.slot(user_key=user_key, address=address):
+            return fn(*args)
+    except AdmissionRejected as e:
+        logger.warning(
+            f"Analysis rejected for {user_key or 'anonymous'} at {address}: {e.detail}"
+        )
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
 @app.post("/api/analyze", response_model=FormAnalysis)
-def analyze_form(request: AnalyzeRequest):
+def analyze_form(
+    request: AnalyzeRequest, http_request: Request, db: Session = Depends(get_db)
+):
+    started = time.monotonic()
+    # cognito_user_id is client-supplied, so the address is always limited too
+    address = _client_address(http_request)
+
+    def admitted_run() -> FormAnalysis:
+        return _run_admitted(
+            address, request.cognito_user_id, _run_analysis, request, db, started
+        )
+
+    # Duplicates join the running call before admission, so retries don't
+    # take extra slots or count against the user's limit; beyond a few
+    # waiters they are turned away instead of tying up threads
+    key = (
+        request.video_url,
+        request.exercise_name.strip().lower(),
+        request.exercise_id,
+        request.latency_budget_ms,
+        request.timeline_points,
+    )
+    try:
+        return analysis_flights.do(key, admitted_run)
+    except TooManyWaiters as e:
+        logger.warning(f"Duplicate analysis rejected for {request.video_url}: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail="This analysis is already in progress",
+            headers={"Retry-After": str(analysis_admission.retry_after())},
+        )
+
+
+@app.post("/api/analyze/landmarks", response_model=FormAnalysis)
+async def analyze_landmarks(
+    http_request: Request,
+    exercise_name: str,
+    exercise_id: Optional[str] = None,
+    timeline_points: Optional[int] = Query(None, gt=0, le=MAX_TIMELINE_POINTS),
+    db: Session = Depends(get_db),
+):
+    """Analyze a landmark series the client computed on-device.
+
+    The body is the binary encoding in services/landmark_codec.py, sent as
+    application/octet-stream. No video is downloaded or decoded, but the
+    analysis still takes a slot from analysis_admission.
+    """
+    limit = max_encoded_size()
+    content_length = http_request.headers.get("content-length")
+    if content_length is not None and (
+        not content_length.isdigit() or int(content_length) > limit
+    ):
+        raise HTTPException(status_code=413, detail="Landmark upload too large")
+
+    body = bytearray()
+    async for chunk in http_request.stream():
+        body.extend(chunk)
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail="Landmark upload too large")
+
+    return await run_in_threadpool(
+        _run_admitted,
+        _client_address(http_request),
+        None,
+        _run_landmark_analysis,
+        bytes(body),
+        exercise_name,
+        exercise_id,
+        timeline_points,
+        db,
+    )
+
+
+def _run_landmark_analysis(
+    body: bytes,
+    exercise_name: str,
+    exercise_id: Optional[str],
+    timeline_points: Optional[int],
+    db: Session,
+) -> FormAnalysis:
+    spec = find_analyzer(exercise_name)
+    if spec is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Analysis not yet supported for '{exercise_name}'. "
+            f"Currently supported: {', '.join(supported_exercises())}.",
+        )
+
+    try:
+        timestamps, points = decode_landmarks(body)
+    except LandmarkFormatError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid landmark series: {e}")
+    logger.info(f"Analyzing {exercise_name} from {len(timestamps)} uploaded frames")
+
+    pose_data = to_pose_data(timestamps, points)
+    if exercise_id:
+        try:
+            save_pose_series(db, exercise_id, exercise_name, pose_data)
+        except ValueError as e:
+            logger.warning(f"Pose series not stored: {e}")
+
+    result = analyze(
+        spec,
+        pose_data,
+        PoseFeatures.from_arrays(timestamps, points),
+        timeline_points=timeline_points,
+    )
+    logger.info(f"Analysis complete. Score: {result.score}")
+    return result
+
+
+def _run_analysis(request: AnalyzeRequest, db: Session, started: float) -> FormAnalysis:
     video_path = None
     try:
         logger.info(f"Analyzing {request.exercise_name} from {request.video_url}")
 
+        spec = find_analyzer(request.exercise_name)
+        if spec is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Analysis not yet supported for '{request.exercise_name}'. "
+                f"Currently supported: {', '.join(supported_exercises())}.",
+            )
+
         logger.info("Downloading video...")
-        video_path = download_video(request.video_url)
+        try:
+            video_path = download_video(
+                request.video_url,
+                deadline=download_deadline(request.latency_budget_ms, started),
+            )
+        except DownloadTimeout as e:
+            logger.warning(f"Video download timed out: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="Latency budget reached while downloading the video"
+                if request.latency_budget_ms is not None
+                else "Timed out downloading the video",
+            )
 
-        logger.info("Extracting frames...")
-        frames = extract_frames(video_path, fps=5)
-        logger.info(f"Extracted {len(frames)} frames")
+        video = probe_video(video_path)
+        plan = plan_analysis(video, ANALYSIS_FPS, request.latency_budget_ms, started)
+        for degradation in plan.degradations:
+            logger.info(f"Budget: {degradation}")
+
+        logger.info(f"Running pose estimation at {plan.fps} fps...")
+        estimator = PoseEstimator(model_complexity=plan.model_complexity)
+        try:
+            pose_data = estimator.process_frames(
+                iter_frames(video_path, plan.fps, plan.max_width),
+                deadline=plan.deadline,
+            )
+        finally:
+            estimator.close()
+        record_inference(
+            plan.model_complexity,
+            estimator.frames_processed,
+            estimator.inference_seconds,
+        )
+        logger.info(
+            f"Pose detected in {len(pose_data)}/{estimator.frames_processed} frames"
+        )
+
+        degradations = list(plan.degradations)
+        if estimator.stopped_at is not None:
+            if estimator.frames_processed == 0:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Latency budget too small to analyze this video",
+                )
+            degradations.append(
+                f"Latency budget reached; analyzed the first "
+                f"{estimator.stopped_at:.1f}s of {video['duration']:.1f}s"
+            )
 
-        if not frames:
+        if estimator.frames_processed == 0:
             raise HTTPException(
                 status_code=400, detail="Could not extract frames from video"
             )
 
-        logger.info("Running pose estimation...")
-        estimator = PoseEstimator()
-        pose_data = estimator.process_frames(frames)
-        estimator.close()
-        logger.info(f"Pose detected in {len(pose_data)}/{len(frames)} frames")
-
         if not pose_data:
             raise HTTPException(
                 status_code=400,
                 detail="Could not detect pose in any frames. Ensure the full body is visible.",
             )
 
-        logger.info("Analyzing form...")
-        exercise_lower = request.exercise_name.lower()
-        if "squat" in exercise_lower:
-            result = analyze_squat(pose_data)
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Analysis not yet supported for '{request.exercise_name}'. Currently supported: squats.",
-            )
+        if request.exercise_id:
+            try:
+                save_pose_series(
+                    db, request.exercise_id, request.exercise_name, pose_data
+                )
+            except ValueError as e:
+                logger.warning(f"Pose series not stored: {e}")
+
+        logger.info(f"Analyzing form with the {spec.exercise_type} analyzer...")
+        result = analyze(spec, pose_data, timeline_points=request.timeline_points)
+        result.degradations = degradations
 
         logger.info(f"Analysis complete. Score: {result.score}")
         return result
@@ -1,7 +1,17 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    Date,
+    DateTime,
+    ForeignKey,
+    JSON,
+    LargeBinary,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -19,6 +29,9 @@ class User(Base):
     email = Column(String, unique=True, nullable=False)
     display_name = Column(String, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Bumped whenever the user's exercises or analysis results change, so
+    # reads can be answered with 304 from this row alone (NULL counts as 0)
+    data_version = Column(Integer, nullable=True, default=0)
 
     exercises = relationship(
         "Exercise", back_populates="user", cascade="all, delete-orphan"
@@ -43,6 +56,12 @@ class Exercise(Base):
         uselist=False,
         cascade="all, delete-orphan",
     )
+    pose_series = relationship(
+        "PoseSeries",
+        back_populates="exercise",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
 
 
 class AnalysisResult(Base):
@@ -55,6 +74,52 @@ class AnalysisResult(Base):
     score = Column(Integer, nullable=False)
     feedback = Column(JSON, nullable=False)
     key_points = Column(JSON, nullable=False)
+    category_scores = Column(JSON, nullable=True)
+    analyzer_version = Column(String, nullable=True, index=True)
     analyzed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     exercise = relationship("Exercise", back_populates="analysis_result")
+
+
+class PoseSeries(Base):
+    """Landmarks detected for an exercise video, kept so results can be re-scored."""
+
+    __tablename__ = "pose_series"
+
+    id = Column(String, primary_key=True, default=_uuid)
+    exercise_id = Column(
+        String, ForeignKey("exercises.id"), nullable=False, unique=True
+    )
+    exercise_name = Column(String, nullable=False)
+    frame_count = Column(Integer, nullable=False)
+    # float32 rows of [timestamp, x, y, visibility, ...], see services/pose_store.py
+    landmarks = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    exercise = relationship("Exercise", back_populates="pose_series")
+
+
+class ProgressRollup(Base):
+    """Per-user aggregate of analysis scores for one exercise type and period.
+
+    Maintained incrementally by services/progress.py whenever a result is
+    saved, so progress charts never have to scan the full history.
+    """
+
+    __tablename__ = "progress_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "exercise_type", "period", "period_start"),
+    )
+
+    id = Column(String, primary_key=True, default=_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    exercise_type = Column(String, nullable=False)
+    period = Column(String, nullable=False)  # "day" or "week"
+    period_start = Column(Date, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    score_min = Column(Integer, nullable=True)
+    score_max = Column(Integer, nullable=True)
+    # {category: sum} and {category: count}; older results may lack sub-scores
+    category_sums = Column(JSON, nullable=False, default=dict)
+    category_counts = Column(JSON, nullable=False, default=dict)
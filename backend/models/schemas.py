@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Upper bound on AnalyzeRequest.timeline_points, which bounds the timeline
+# payload however long the video is
+MAX_TIMELINE_POINTS = 1000
 
 
 # ---------------------------------------------------------------------------
@@ -13,6 +17,17 @@ from pydantic import BaseModel
 class AnalyzeRequest(BaseModel):
     video_url: str
     exercise_name: str
+    # When set, the detected pose series is stored against this exercise so
+    # the result can be re-scored after analyzer changes.
+    exercise_id: Optional[str] = None
+    # Total time the caller is willing to wait. The pipeline degrades
+    # sampling rate, frame size and model, or stops early, to fit it.
+    latency_budget_ms: Optional[int] = Field(default=None, gt=0)
+    # Used for per-user admission limits; falls back to the client address
+    cognito_user_id: Optional[str] = None
+    # When set, the response includes a joint-angle timeline downsampled to
+    # about this many points
+    timeline_points: Optional[int] = Field(default=None, gt=0, le=MAX_TIMELINE_POINTS)
 
 
 class KeyPoint(BaseModel):
@@ -21,10 +36,33 @@ class KeyPoint(BaseModel):
     severity: Literal["low", "medium", "high"]
 
 
+class TimelineRep(BaseModel):
+    start: float
+    bottom: float
+    end: float
+
+
+class AngleTimeline(BaseModel):
+    timestamps: list[float]
+    # Angle series in degrees keyed by feature name (e.g. "knee_angle"),
+    # each aligned with timestamps
+    angles: dict[str, list[float]]
+    # Rep boundaries and bottoms; each of these timestamps is a sample. Long
+    # sessions list only the reps that fit the point budget (see
+    # analyzers.timeline.build_timeline)
+    reps: list[TimelineRep] = []
+
+
 class FormAnalysis(BaseModel):
     score: int
     feedback: list[str]
     keyPoints: list[KeyPoint]
+    # Per-category sub-scores (0-1) averaged over reps, e.g. {"depth": 0.7}
+    categoryScores: dict[str, float] = {}
+    analyzerVersion: Optional[str] = None
+    # Shortcuts taken to meet latency_budget_ms, empty when none were needed
+    degradations: list[str] = []
+    timeline: Optional[AngleTimeline] = None
 
 
 class HealthResponse(BaseModel):
@@ -68,6 +106,8 @@ class AnalysisResultResponse(BaseModel):
     score: int
     feedback: list[str]
     key_points: list[dict]
+    category_scores: Optional[dict[str, float]] = None
+    analyzer_version: Optional[str] = None
     analyzed_at: datetime
 
     model_config = {"from_attributes": True}
@@ -94,3 +134,20 @@ class SaveAnalysisRequest(BaseModel):
     score: int
     feedback: list[str]
     key_points: list[dict]
+    category_scores: Optional[dict[str, float]] = None
+    analyzer_version: Optional[str] = None
+
+
+# ---------------------------------------------------------------------------
+# Progress schemas
+# ---------------------------------------------------------------------------
+
+class ProgressPoint(BaseModel):
+    exercise_type: str
+    period: Literal["day", "week"]
+    period_start: date
+    count: int
+    mean_score: float
+    min_score: Optional[int]
+    max_score: Optional[int]
+    category_averages: dict[str, float]
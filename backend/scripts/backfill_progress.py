@@ -0,0 +1,50 @@
+"""Rebuild the per-user progress rollups from the full analysis history.
+
+Usage (from backend/):
+    python -m scripts.backfill_progress [--cognito-user-id ID]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import SessionLocal, engine  # noqa: E402
+from models import db_models  # noqa: E402
+from services.progress import rebuild_rollups  # noqa: E402
+from services.user import get_user_by_cognito_id  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cognito-user-id", default=None)
+    args = parser.parse_args()
+
+    db_models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user_id = None
+        if args.cognito_user_id:
+            user = get_user_by_cognito_id(db, args.cognito_user_id)
+            if not user:
+                raise SystemExit(f"No user found for cognito_user_id: {args.cognito_user_id}")
+            user_id = user.id
+
+        started = time.monotonic()
+        written = rebuild_rollups(db, user_id)
+        logger.info(
+            f"Rebuilt {written} rollup row(s) in {time.monotonic() - started:.1f}s"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
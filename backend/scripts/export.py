@@ -0,0 +1,60 @@
+"""Export users, exercises and analysis results for offline analysis.
+
+Each dataset is streamed to its own file in the output directory with
+constant memory (see services/export.py).
+
+Usage (from backend/):
+    python -m scripts.export [--out-dir DIR] [--format csv|parquet]
+        [--datasets users exercises analysis_results key_points] [--batch-size N]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import SessionLocal  # noqa: E402
+from services.export import (  # noqa: E402
+    DATASETS,
+    DEFAULT_BATCH_SIZE,
+    FORMATS,
+    stream_export,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out-dir", default="exports")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    db = SessionLocal()
+    try:
+        for dataset in args.datasets:
+            path = os.path.join(args.out_dir, f"{dataset}.{args.format}")
+            started = time.monotonic()
+            written = 0
+            with open(path, "wb") as f:
+                for chunk in stream_export(db, dataset, args.format, args.batch_size):
+                    f.write(chunk)
+                    written += len(chunk)
+            logger.info(
+                f"Wrote {path} ({written / 1e6:.1f} MB) in {time.monotonic() - started:.1f}s"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
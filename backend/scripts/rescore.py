@@ -0,0 +1,204 @@
+"""Re-score stored pose series with the current analyzer version.
+
+Results whose analyzer_version differs from the current version of their
+registered analyzer are re-analyzed in a process pool and written back in
+batches. Already re-scored rows are tagged with the new version, so an
+interrupted run simply resumes where it stopped when started again.
+
+Each batch is one transaction: a bulk update of the results, their old and
+new scores folded into the progress rollups as per-rollup deltas, and one
+bump of the owners' data versions so cached exercise lists are revalidated.
+Rollups therefore stay consistent however a run ends. (Rollups left stale
+by older versions of this script can be repaired with
+scripts.backfill_progress.)
+
+Usage (from backend/):
+    python -m scripts.rescore [--workers N] [--chunk-size N] [--limit N]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import func, or_, select, update
+
+load_dotenv()
+
+from database import SessionLocal  # noqa: E402
+from models.db_models import AnalysisResult, Exercise, PoseSeries  # noqa: E402
+from analyzers import (  # noqa: E402
+    AnalyzerSpec,
+    analyze,
+    analyzer_version,
+    find_analyzer,
+    registered_analyzers,
+)
+from services.pose_store import deserialize_pose_data  # noqa: E402
+from services.progress import RollupChange, apply_rollup_changes  # noqa: E402
+from services.user import bump_data_versions  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _score_chunk(items: list[tuple[str, str, int, bytes]]) -> list[dict]:
+    """Analyze a chunk of (result_id, exercise_name, frame_count, landmarks)."""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for result_id, exercise_name, frame_count, landmarks in items:
+        spec = find_analyzer(exercise_name)
+        if spec is None:
+            continue
+        analysis = analyze(spec, deserialize_pose_data(landmarks, frame_count))
+        rows.append(
+            {
+                "id": result_id,
+                "score": analysis.score,
+                "feedback": analysis.feedback,
+                "key_points": [kp.model_dump() for kp in analysis.keyPoints],
+                "category_scores": analysis.categoryScores,
+                "analyzer_version": analysis.analyzerVersion,
+                "analyzed_at": now,
+            }
+        )
+    return rows
+
+
+def _write_chunk(db, rows: list[dict]) -> None:
+    """Store a chunk of new scores, update the rollups and bump the owners'
+    data versions in one transaction, with a handful of statements."""
+    old = db.execute(
+        select(
+            AnalysisResult.id,
+            AnalysisResult.score,
+            AnalysisResult.category_scores,
+            Exercise.user_id,
+            Exercise.name,
+            Exercise.created_at,
+        )
+        .join(Exercise, Exercise.id == AnalysisResult.exercise_id)
+        .where(AnalysisResult.id.in_([row["id"] for row in rows]))
+    ).all()
+    db.execute(update(AnalysisResult), rows)
+
+    # New scores are written before the rollups change, so any min/max
+    # recompute already sees them
+    new = {row["id"]: row for row in rows}
+    changes = []
+    for result_id, score, category_scores, user_id, name, created_at in old:
+        row = new[result_id]
+        if (row["score"], row["category_scores"]) == (score, category_scores):
+            continue
+        changes.append(RollupChange(user_id, name, created_at, score, category_scores, -1))
+        changes.append(
+            RollupChange(user_id, name, created_at, row["score"], row["category_scores"], 1)
+        )
+    apply_rollup_changes(db, changes)
+    bump_data_versions(db, {r.user_id for r in old})
+    db.commit()
+
+
+def _stale_filter(spec: AnalyzerSpec):
+    return (
+        func.lower(PoseSeries.exercise_name).contains(spec.exercise_type),
+        or_(
+            AnalysisResult.analyzer_version.is_(None),
+            AnalysisResult.analyzer_version != analyzer_version(spec),
+        ),
+    )
+
+
+def _iter_chunks(db, specs: list[AnalyzerSpec], chunk_size: int, limit: int | None):
+    """Yield chunks of stale results using keyset pagination on result id."""
+    fetched = 0
+    for spec in specs:
+        last_id = ""
+        while limit is None or fetched < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - fetched)
+            rows = db.execute(
+                select(
+                    AnalysisResult.id,
+                    PoseSeries.exercise_name,
+                    PoseSeries.frame_count,
+                    PoseSeries.landmarks,
+                )
+                .join(PoseSeries, PoseSeries.exercise_id == AnalysisResult.exercise_id)
+                .where(*_stale_filter(spec), AnalysisResult.id > last_id)
+                .order_by(AnalysisResult.id)
+                .limit(size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            fetched += len(rows)
+            yield [tuple(r) for r in rows]
+
+
+def rescore(workers: int, chunk_size: int, limit: int | None = None) -> int:
+    """Re-score all stale results. Returns the number of rows updated."""
+    specs = registered_analyzers()
+    db = SessionLocal()
+    try:
+        total = 0
+        for spec in specs:
+            stale = db.query(AnalysisResult.id).join(
+                PoseSeries, PoseSeries.exercise_id == AnalysisResult.exercise_id
+            ).filter(*_stale_filter(spec)).count()
+            logger.info(f"{stale} result(s) to re-score with {analyzer_version(spec)}")
+            total += stale
+        if limit is not None:
+            total = min(total, limit)
+        logger.info(f"Using {workers} workers, chunks of {chunk_size}")
+
+        updated = 0
+        started = time.monotonic()
+        chunks = _iter_chunks(db, specs, chunk_size, limit)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                # Keep every worker busy without reading the whole table ahead
+                while not exhausted and len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        pending.add(pool.submit(_score_chunk, chunk))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rows = future.result()
+                    if rows:
+                        _write_chunk(db, rows)
+                    updated += len(rows)
+
+                elapsed = time.monotonic() - started
+                rate = updated / elapsed if elapsed else 0.0
+                logger.info(f"Re-scored {updated}/{total} ({rate:.0f}/s)")
+
+        return updated
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    updated = rescore(args.workers, args.chunk_size, args.limit)
+    logger.info(f"Done. {updated} result(s) re-scored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Admission control for expensive analysis requests.
+
+Every /api/analyze request holds decoded frames and a pose model while it
+runs, so running too many at once makes all of them slow and can exhaust
+memory. AdmissionController caps the number running at once, lets a
+bounded number wait in FIFO order, and caps how many a single user may
+have running or waiting so one account can't starve the rest. The client
+address gets its own, larger cap: user ids are client-supplied, but many
+users can share one address (carrier NAT), so it can't be held to the
+per-user limit. Anything beyond that is rejected immediately with a
+Retry-After hint instead of piling up.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted.
+
+    status_code is 429 when the caller hit their own limit and 503 when the
+    service as a whole is saturated.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        per_user_limit: int,
+        queue_timeout: float,
+        per_address_limit: int | None = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.per_user_limit = per_user_limit
+        self.per_address_limit = (
+            per_address_limit if per_address_limit is not None else per_user_limit
+        )
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting: deque[object] = deque()
+        self._per_user: dict[str, int] = {}
+        self._per_address: dict[str, int] = {}
+        # Exponential moving average of how long an admitted request runs
+        self._service_time = 5.0
+
+        self._admitted_total = 0
+        self._rejected: dict[str, int] = {
+            "user_limit": 0,
+            "address_limit": 0,
+            "queue_full": 0,
+            "timeout": 0,
+        }
+        self._peak_queue = 0
+        self._wait_total = 0.0
+
+    def retry_after(self) -> int:
+        """Rough seconds until a slot frees up for a new request."""
+        backlog = self._active + len(self._waiting)
+        rounds = backlog / max(1, self.max_concurrent)
+        return max(1, math.ceil(rounds * self._service_time))
+
+    def _reject(self, reason: str, status_code: int, detail: str):
+        self._rejected[reason] += 1
+        raise AdmissionRejected(status_code, detail, self.retry_after())
+
+    @contextmanager
+    def slot(self, user_key: str | None = None, address: str | None = None):
+        """Hold one analysis slot for the duration of the with-block.
+
+        The user is held to per_user_limit and the address to
+        per_address_limit; either may be None when unknown.
+
+        Raises:
+            AdmissionRejected: if the user or address is over its limit, the
+                wait queue is full, or no slot frees up within queue_timeout
+        """
+        holds = []
+        if user_key is not None:
+            holds.append((self._per_user, user_key))
+        if address is not None:
+            holds.append((self._per_address, address))
+
+        with self._cond:
+            if user_key is not None and self._per_user.get(user_key, 0) >= self.per_user_limit:
+                self._reject(
+                    "user_limit",
+                    429,
+                    f"Too many analyses in progress for this user (limit {self.per_user_limit})",
+                )
+            if (
+                address is not None
+                and self._per_address.get(address, 0) >= self.per_address_limit
+            ):
+                self._reject(
+                    "address_limit",
+                    429,
+                    "Too many analyses in progress from this address "
+                    f"(limit {self.per_address_limit})",
+                )
+
+            if self._active >= self.max_concurrent or self._waiting:
+                if len(self._waiting) >= self.max_queue:
+                    self._reject("queue_full", 503, "Analysis service is busy")
+
+                ticket = object()
+                self._waiting.append(ticket)
+                self._hold(holds)
+                self._peak_queue = max(self._peak_queue, len(self._waiting))
+                queued_at = time.monotonic()
+                deadline = queued_at + self.queue_timeout
+
+                # FIFO: only the head of the queue may take a free slot
+                while not (
+                    self._waiting[0] is ticket and self._active < self.max_concurrent
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting.remove(ticket)
+                        self._release(holds)
+                        self._cond.notify_all()
+                        self._reject("timeout", 503, "Timed out waiting for an analysis slot")
+                    self._cond.wait(remaining)
+
+                self._waiting.popleft()
+                self._wait_total += time.monotonic() - queued_at
+            else:
+                self._hold(holds)
+
+            self._active += 1
+            self._admitted_total += 1
+            # The next waiter may also be able to go if more slots are free
+            self._cond.notify_all()
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._cond:
+                elapsed = time.monotonic() - started
+                self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+                self._active -= 1
+                self._release(holds)
+                self._cond.notify_all()
+
+    @staticmethod
+    def _hold(holds: list[tuple[dict[str, int], str]]):
+        for counts, key in holds:
+            counts[key] = counts.get(key, 0) + 1
+
+    @staticmethod
+    def _release(holds: list[tuple[dict[str, int], str]]):
+        for counts, key in holds:
+            count = counts.get(key, 0) - 1
+            if count > 0:
+                counts[key] = count
+            else:
+                counts.pop(key, None)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": len(self._waiting),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "per_user_limit": self.per_user_limit,
+                "per_address_limit": self.per_address_limit,
+                "peak_queued": self._peak_queue,
+                "admitted_total": self._admitted_total,
+                "rejected_total": dict(self._rejected),
+                "avg_wait_seconds": round(
+                    self._wait_total / self._admitted_total, 3
+                ) if self._admitted_total else 0.0,
+                "avg_service_seconds": round(self._service_time, 3),
+            }
@@ -0,0 +1,122 @@
+"""Fit video analysis into a caller-supplied latency budget.
+
+plan_analysis estimates how long pose estimation will take for a video and
+picks the least damaging degradations that bring it within the remaining
+budget: downscaling, a lower sampling rate (landmarks are smoothed, so
+3-4 fps stays stable) and the lite pose model. Whatever still doesn't fit
+is cut off by the plan's deadline, which PoseEstimator.process_frames
+enforces.
+
+The per-frame inference cost starts from conservative defaults and is
+updated from real runs via record_inference.
+"""
+from __future__ import annotations
+
+import time
+from typing import NamedTuple
+
+# Seconds per analyzed frame by mediapipe model_complexity, refined at runtime
+_inference_cost = {0: 0.02, 1: 0.04}
+_EMA_WEIGHT = 0.2
+
+# Seconds to grab/decode one source frame per megapixel
+DECODE_COST_PER_MPIX = 0.0025
+# Seconds to resize/convert one sampled frame per megapixel before inference
+PREPROCESS_COST_PER_MPIX = 0.003
+
+# Kept back for analysis, serialization and response
+RESERVE_SECONDS = 0.3
+
+DOWNSCALE_WIDTH = 640
+MIN_FPS = 2
+
+
+class AnalysisPlan(NamedTuple):
+    fps: int
+    max_width: int | None
+    model_complexity: int
+    deadline: float | None  # time.monotonic() value, None when unbounded
+    degradations: list[str]
+
+
+def record_inference(model_complexity: int, frames: int, seconds: float) -> None:
+    """Fold measured inference time into the cost model."""
+    if frames <= 0:
+        return
+    per_frame = seconds / frames
+    current = _inference_cost.get(model_complexity, per_frame)
+    _inference_cost[model_complexity] = (
+        (1 - _EMA_WEIGHT) * current + _EMA_WEIGHT * per_frame
+    )
+
+
+def estimate_seconds(
+    video: dict, fps: int, model_complexity: int, max_width: int | None = None
+) -> float:
+    """Estimated decode + inference time for a video probed by probe_video."""
+    mpix = video["width"] * video["height"] / 1e6
+    decode = video["frame_count"] * mpix * DECODE_COST_PER_MPIX
+    if max_width and video["width"] > max_width:
+        mpix *= (max_width / video["width"]) ** 2
+    per_frame = mpix * PREPROCESS_COST_PER_MPIX + _inference_cost[model_complexity]
+    return decode + video["duration"] * min(fps, video["fps"]) * per_frame
+
+
+def download_deadline(budget_ms: int | None, started: float) -> float | None:
+    """time.monotonic() by which the video must be downloaded, or None."""
+    if budget_ms is None:
+        return None
+    return started + budget_ms / 1000 - RESERVE_SECONDS
+
+
+def plan_analysis(
+    video: dict,
+    default_fps: int,
+    budget_ms: int | None = None,
+    started: float | None = None,
+) -> AnalysisPlan:
+    """Choose sampling rate, frame size and model to fit the budget.
+
+    Args:
+        video: Stream properties from services.video.probe_video
+        default_fps: Sampling rate used when there is no budget pressure
+        budget_ms: Total latency budget for the request, or None
+        started: time.monotonic() when the request started (defaults to now)
+    """
+    if budget_ms is None:
+        return AnalysisPlan(default_fps, None, 1, None, [])
+
+    now = time.monotonic()
+    deadline = (started if started is not None else now) + budget_ms / 1000
+    remaining = deadline - RESERVE_SECONDS - now
+
+    fps = default_fps
+    max_width = None
+    complexity = 1
+    degradations = []
+
+    def fits() -> bool:
+        return estimate_seconds(video, fps, complexity, max_width) <= remaining
+
+    # Cheapest quality loss first. Downscaling barely matters since the pose
+    # model works on a 256px crop anyway.
+    if not fits() and video["width"] > DOWNSCALE_WIDTH:
+        max_width = DOWNSCALE_WIDTH
+        degradations.append(f"Frames downscaled to {DOWNSCALE_WIDTH}px wide")
+
+    requested_fps = fps
+    while not fits() and fps > 3:
+        fps -= 1
+    if not fits() and complexity == 1:
+        complexity = 0
+        degradations.append("Used the lite pose model")
+    while not fits() and fps > MIN_FPS:
+        fps -= 1
+    if fps != requested_fps:
+        degradations.append(f"Sampled at {fps} fps instead of {requested_fps}")
+
+    # If it still doesn't fit, processing stops at the deadline and the
+    # caller reports how much of the video was analyzed
+    return AnalysisPlan(
+        fps, max_width, complexity, deadline - RESERVE_SECONDS, degradations
+    )
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from models.db_models import Exercise, AnalysisResult, User
 from models.schemas import ExerciseCreate, SaveAnalysisRequest
+from services.progress import add_to_rollups, remove_from_rollups
+from services.user import bump_data_version
 
 
 def create_exercise(db: Session, data: ExerciseCreate) -> Exercise:
@@ -19,6 +21,7 @@ def create_exercise(db: Session, data: ExerciseCreate) -> Exercise:
         thumbnail_url=data.thumbnail_url,
     )
     db.add(exercise)
+    bump_data_version(db, user.id)
     db.commit()
     db.refresh(exercise)
     return exercise
@@ -31,6 +34,7 @@ def get_user_exercises(db: Session, cognito_user_id: str) -> list[Exercise]:
     return (
         db.query(Exercise)
         .filter(Exercise.user_id == user.id)
+        .options(selectinload(Exercise.analysis_result))
         .order_by(Exercise.created_at.desc())
         .all()
     )
@@ -49,12 +53,17 @@ def delete_exercise(db: Session, exercise_id: str, cognito_user_id: str) -> bool
     if not exercise:
         return False
 
+    if exercise.analysis_result:
+        remove_from_rollups(db, exercise, exercise.analysis_result)
     db.delete(exercise)
+    bump_data_version(db, user.id)
     db.commit()
     return True
 
 
 def save_analysis_result(db: Session, data: SaveAnalysisRequest) -> AnalysisResult:
+    exercise = db.query(Exercise).filter(Exercise.id == data.exercise_id).first()
+
     # Replace any existing result for this exercise
     existing = (
         db.query(AnalysisResult)
@@ -62,6 +71,8 @@ def save_analysis_result(db: Session, data: SaveAnalysisRequest) -> AnalysisResu
         .first()
     )
     if existing:
+        if exercise:
+            remove_from_rollups(db, exercise, existing)
         db.delete(existing)
         db.commit()
 
@@ -70,8 +81,13 @@ def save_analysis_result(db: Session, data: SaveAnalysisRequest) -> AnalysisResu
         score=data.score,
         feedback=data.feedback,
         key_points=data.key_points,
+        category_scores=data.category_scores,
+        analyzer_version=data.analyzer_version,
     )
     db.add(result)
+    if exercise:
+        add_to_rollups(db, exercise, data.score, data.category_scores)
+        bump_data_version(db, exercise.user_id)
     db.commit()
     db.refresh(result)
     return result
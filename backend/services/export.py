@@ -0,0 +1,279 @@
+"""Streaming columnar export of users, exercises and analysis results.
+
+Rows are read with a server-side cursor (``stream_results``) in batches of
+``batch_size`` and written out one batch at a time, so memory stays flat
+however many rows there are. Only plain columns are selected, never ORM
+entities, and JSON columns are flattened per row:
+
+- analysis_results: feedback joined into one text column with " | ",
+  category_scores as JSON text, and the number of key points
+- key_points: one row per key point of every analysis result
+
+User emails are not exported. The datasets span every user, so they are
+only written by scripts/export.py and not served over HTTP.
+
+CSV needs nothing beyond the standard library; Parquet requires pyarrow,
+which is imported only when a Parquet export runs.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from models.db_models import AnalysisResult, Exercise, User
+from services.progress import exercise_type
+
+FORMATS = ("csv", "parquet")
+DEFAULT_BATCH_SIZE = 10_000
+
+
+class Dataset(NamedTuple):
+    # (name, type), type being "string", "int", "float" or "timestamp"
+    columns: list[tuple[str, str]]
+    query: Callable[[], Select]
+    # Turns one selected row into zero or more output rows
+    flatten: Callable[[tuple], Iterable[tuple]]
+
+
+def _identity(row: tuple) -> Iterable[tuple]:
+    return (tuple(row),)
+
+
+def _flatten_result(row: tuple) -> Iterable[tuple]:
+    (result_id, exercise_id, user_id, name, score, version, analyzed_at,
+     feedback, category_scores, key_points) = row
+    return ((
+        result_id,
+        exercise_id,
+        user_id,
+        name,
+        exercise_type(name),
+        score,
+        version,
+        analyzed_at,
+        " | ".join(feedback or []),
+        json.dumps(category_scores) if category_scores else None,
+        len(key_points or []),
+    ),)
+
+
+def _flatten_key_points(row: tuple) -> Iterable[tuple]:
+    result_id, exercise_id, user_id, name, key_points = row
+    ex_type = exercise_type(name)
+    for position, kp in enumerate(key_points or []):
+        yield (
+            result_id,
+            exercise_id,
+            user_id,
+            ex_type,
+            position,
+            kp.get("timestamp"),
+            kp.get("issue"),
+            kp.get("severity"),
+        )
+
+
+def _result_columns(*extra) -> Select:
+    return (
+        select(
+            AnalysisResult.id,
+            AnalysisResult.exercise_id,
+            Exercise.user_id,
+            Exercise.name,
+            *extra,
+        )
+        .join(Exercise, Exercise.id == AnalysisResult.exercise_id)
+        .order_by(AnalysisResult.id)
+    )
+
+
+DATASETS: dict[str, Dataset] = {
+    "users": Dataset(
+        columns=[
+            ("id", "string"),
+            ("cognito_user_id", "string"),
+            ("display_name", "string"),
+            ("created_at", "timestamp"),
+        ],
+        query=lambda: select(
+            User.id, User.cognito_user_id, User.display_name, User.created_at
+        ).order_by(User.id),
+        flatten=_identity,
+    ),
+    "exercises": Dataset(
+        columns=[
+            ("id", "string"),
+            ("user_id", "string"),
+            ("name", "string"),
+            ("category", "string"),
+            ("video_url", "string"),
+            ("created_at", "timestamp"),
+        ],
+        query=lambda: select(
+            Exercise.id,
+            Exercise.user_id,
+            Exercise.name,
+            Exercise.category,
+            Exercise.video_url,
+            Exercise.created_at,
+        ).order_by(Exercise.id),
+        flatten=_identity,
+    ),
+    "analysis_results": Dataset(
+        columns=[
+            ("id", "string"),
+            ("exercise_id", "string"),
+            ("user_id", "string"),
+            ("exercise_name", "string"),
+            ("exercise_type", "string"),
+            ("score", "int"),
+            ("analyzer_version", "string"),
+            ("analyzed_at", "timestamp"),
+            ("feedback", "string"),
+            ("category_scores", "string"),
+            ("key_point_count", "int"),
+        ],
+        query=lambda: _result_columns(
+            AnalysisResult.score,
+            AnalysisResult.analyzer_version,
+            AnalysisResult.analyzed_at,
+            AnalysisResult.feedback,
+            AnalysisResult.category_scores,
+            AnalysisResult.key_points,
+        ),
+        flatten=_flatten_result,
+    ),
+    "key_points": Dataset(
+        columns=[
+            ("analysis_result_id", "string"),
+            ("exercise_id", "string"),
+            ("user_id", "string"),
+            ("exercise_type", "string"),
+            ("position", "int"),
+            ("timestamp", "float"),
+            ("issue", "string"),
+            ("severity", "string"),
+        ],
+        query=lambda: _result_columns(AnalysisResult.key_points),
+        flatten=_flatten_key_points,
+    ),
+}
+
+
+def iter_batches(
+    db: Session, dataset: str, batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[list[tuple]]:
+    """Yield the dataset's flattened rows in batches of about batch_size."""
+    spec = DATASETS[dataset]
+    result = db.execute(
+        spec.query().execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        rows = [out for row in partition for out in spec.flatten(row)]
+        if rows:
+            yield rows
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(
+    columns: list[tuple[str, str]], batches: Iterable[list[tuple]]
+) -> Iterator[bytes]:
+    """Encode batches as CSV, yielding one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    yield buffer.getvalue().encode()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_parquet(
+    columns: list[tuple[str, str]], batches: Iterable[list[tuple]]
+) -> Iterator[bytes]:
+    """Encode batches as Parquet, one row group per batch."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "timestamp": pa.timestamp("us"),
+    }
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in batches:
+            values = list(zip(*rows))
+            writer.write_table(
+                pa.Table.from_arrays(
+                    [pa.array(col, type=field.type) for col, field in zip(values, schema)],
+                    schema=schema,
+                )
+            )
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(
+    db: Session, dataset: str, fmt: str, batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """Stream one dataset in the given format.
+
+    Raises:
+        ValueError: if the dataset or format is unknown
+    """
+    if dataset not in DATASETS:
+        raise ValueError(
+            f"Unknown dataset '{dataset}'. Available: {', '.join(DATASETS)}"
+        )
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Available: {', '.join(FORMATS)}")
+    writer = stream_csv if fmt == "csv" else stream_parquet
+    return writer(DATASETS[dataset].columns, iter_batches(db, dataset, batch_size))
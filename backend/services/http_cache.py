@@ -0,0 +1,53 @@
+"""Conditional GETs and compression for per-user list responses.
+
+ETags are derived from the user's data version (see
+services/user.bump_data_version), so a matching If-None-Match can be
+answered with 304 after reading only the users row. Bodies are gzipped
+when the client accepts it and they are large enough to benefit. ETags
+are weak because the same version may be sent with or without gzip.
+"""
+from __future__ import annotations
+
+import gzip
+
+from fastapi import Request, Response
+
+GZIP_MIN_BYTES = 1024
+
+
+def make_etag(resource: str, user_id: str, version: int) -> str:
+    return f'W/"{resource}-{user_id}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag))
+
+
+def json_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serialized JSON with the ETag, gzipped if accepted and worthwhile."""
+    headers = _cache_headers(etag)
+    accepts = request.headers.get("accept-encoding", "")
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in accepts:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        # Clients may keep the body but must revalidate before using it
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
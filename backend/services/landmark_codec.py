@@ -0,0 +1,147 @@
+"""Compact binary encoding for pose landmark series computed on the client.
+
+Layout (little-endian):
+
+    header (12 bytes)
+        magic           4s   b"RPLM"
+        version         u8   1
+        flags           u8   bit 0: payload is zlib-compressed
+        landmark_count  u8   must be 33 (MediaPipe pose)
+        reserved        u8   0
+        frame_count     u32
+    payload (optionally zlib-compressed)
+        timestamps      u32[frame_count]                     milliseconds, at least 16 apart
+        coords          i16[frame_count][landmark_count][2]  x, y * 10000
+        visibility      u8[frame_count][landmark_count]      visibility * 255
+
+That is 169 bytes per frame before compression, so a minute at 5 fps is
+about 50 KB, against megabytes for the video it replaces.
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+
+import numpy as np
+
+from analyzers.landmarks import NUM_LANDMARKS
+
+MAGIC = b"RPLM"
+VERSION = 1
+FLAG_ZLIB = 0x01
+
+COORD_SCALE = 10000
+# Ten minutes at 30 fps
+MAX_FRAMES = 18000
+# 60 fps, rounded down so whole-millisecond timestamps at 60 fps pass
+MIN_FRAME_INTERVAL_MS = 16
+
+_HEADER = struct.Struct("<4sBBBBI")
+
+
+class LandmarkFormatError(ValueError):
+    """Raised when an uploaded landmark series is malformed."""
+
+
+def _payload_size(frame_count: int) -> int:
+    return frame_count * (4 + NUM_LANDMARKS * 2 * 2 + NUM_LANDMARKS)
+
+
+def max_encoded_size() -> int:
+    """Upper bound on a valid upload (uncompressed, MAX_FRAMES frames)."""
+    return _HEADER.size + _payload_size(MAX_FRAMES)
+
+
+def encode_landmarks(
+    timestamps: np.ndarray, points: np.ndarray, compress: bool = True
+) -> bytes:
+    """Encode a series.
+
+    Args:
+        timestamps: Array of shape (frames,) in seconds
+        points: Array of shape (frames, 33, 3) holding x, y, visibility
+    """
+    frames = len(timestamps)
+    ts = np.round(np.asarray(timestamps) * 1000).astype("<u4")
+    coords = np.clip(
+        np.round(points[:, :, :2] * COORD_SCALE), -32768, 32767
+    ).astype("<i2")
+    vis = np.round(np.clip(points[:, :, 2], 0, 1) * 255).astype(np.uint8)
+
+    payload = ts.tobytes() + coords.tobytes() + vis.tobytes()
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, 6)
+        flags |= FLAG_ZLIB
+    return _HEADER.pack(MAGIC, VERSION, flags, NUM_LANDMARKS, 0, frames) + payload
+
+
+def decode_landmarks(data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """Decode and validate a series.
+
+    Returns:
+        (timestamps in seconds, points of shape (frames, 33, 3))
+
+    Raises:
+        LandmarkFormatError: on any structural or range problem
+    """
+    if len(data) < _HEADER.size:
+        raise LandmarkFormatError("Payload shorter than header")
+    magic, version, flags, landmark_count, reserved, frames = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise LandmarkFormatError("Not a landmark series (bad magic)")
+    if version != VERSION:
+        raise LandmarkFormatError(f"Unsupported format version {version}")
+    if flags & ~FLAG_ZLIB or reserved:
+        raise LandmarkFormatError("Unknown flags set")
+    if landmark_count != NUM_LANDMARKS:
+        raise LandmarkFormatError(
+            f"Expected {NUM_LANDMARKS} landmarks per frame, got {landmark_count}"
+        )
+    if not 0 < frames <= MAX_FRAMES:
+        raise LandmarkFormatError(f"Frame count must be between 1 and {MAX_FRAMES}")
+
+    expected = _payload_size(frames)
+    payload = data[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        # Bounded decompression so a small upload can't expand without limit
+        inflater = zlib.decompressobj()
+        try:
+            payload = inflater.decompress(payload, expected + 1)
+        except zlib.error as e:
+            raise LandmarkFormatError(f"Corrupt compressed payload: {e}")
+        if not inflater.eof or inflater.unconsumed_tail or inflater.unused_data:
+            raise LandmarkFormatError("Compressed payload size doesn't match frame count")
+    if len(payload) != expected:
+        raise LandmarkFormatError("Payload size doesn't match frame count")
+
+    ts_end = frames * 4
+    coords_end = ts_end + frames * NUM_LANDMARKS * 4
+    ts_ms = np.frombuffer(payload, dtype="<u4", count=frames).astype(np.int64)
+    coords = np.frombuffer(payload[ts_end:coords_end], dtype="<i2").reshape(
+        frames, NUM_LANDMARKS, 2
+    )
+    vis = np.frombuffer(payload[coords_end:], dtype=np.uint8).reshape(
+        frames, NUM_LANDMARKS
+    )
+
+    if frames > 1 and np.any(np.diff(ts_ms) < MIN_FRAME_INTERVAL_MS):
+        raise LandmarkFormatError(
+            f"Timestamps must increase by at least {MIN_FRAME_INTERVAL_MS} ms (60 fps)"
+        )
+    ts = ts_ms / 1000
+
+    points = np.empty((frames, NUM_LANDMARKS, 3), dtype=np.float64)
+    points[:, :, :2] = coords / COORD_SCALE
+    points[:, :, 2] = vis / 255
+    return ts, points
+
+
+def to_pose_data(
+    timestamps: np.ndarray, points: np.ndarray
+) -> list[tuple[float, dict]]:
+    """Convert decoded arrays into the (timestamp, landmarks) pairs analyzers take."""
+    pose_data = []
+    for t, frame in zip(timestamps.tolist(), points.tolist()):
+        pose_data.append((t, {idx: tuple(lm) for idx, lm in enumerate(frame)}))
+    return pose_data
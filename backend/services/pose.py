@@ -1,18 +1,28 @@
 from __future__ import annotations
 
-import mediapipe as mp
-import numpy as np
+import time
+from typing import Iterable
 
-mp_pose = mp.solutions.pose
+import numpy as np
 
 
 class PoseEstimator:
-    def __init__(self):
-        self.pose = mp_pose.Pose(
+    def __init__(self, model_complexity: int = 1):
+        # Imported here so processes that never run inference (CRUD-only
+        # workers, re-scoring) don't pay mediapipe's import time and memory
+        import mediapipe as mp
+
+        self.pose = mp.solutions.pose.Pose(
             static_image_mode=True,
-            model_complexity=1,
+            model_complexity=model_complexity,
             min_detection_confidence=0.5,
         )
+        self.model_complexity = model_complexity
+        # Set by process_frames: frames run through the model, seconds spent
+        # in it, and the timestamp at which a deadline cut processing short
+        self.frames_processed = 0
+        self.inference_seconds = 0.0
+        self.stopped_at: float | None = None
 
     def process_frame(self, frame: np.ndarray) -> dict | None:
         """Run pose estimation on a single frame.
@@ -33,19 +43,29 @@ class PoseEstimator:
         return landmarks
 
     def process_frames(
-        self, frames: list[tuple[float, np.ndarray]]
+        self,
+        frames: Iterable[tuple[float, np.ndarray]],
+        deadline: float | None = None,
     ) -> list[tuple[float, dict]]:
         """Process multiple frames and return those with detected poses.
 
         Args:
-            frames: List of (timestamp, frame) tuples
+            frames: Iterable of (timestamp, frame) tuples
+            deadline: Optional time.monotonic() value; no further frames are
+                consumed once it has passed
 
         Returns:
             List of (timestamp, landmarks) tuples for frames where pose was detected
         """
         results = []
         for timestamp, frame in frames:
+            if deadline is not None and time.monotonic() >= deadline:
+                self.stopped_at = timestamp
+                break
+            started = time.monotonic()
             landmarks = self.process_frame(frame)
+            self.inference_seconds += time.monotonic() - started
+            self.frames_processed += 1
             if landmarks is not None:
                 results.append((timestamp, landmarks))
         return results
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.db_models import Exercise, PoseSeries
+
+
+def serialize_pose_data(pose_data: list[tuple[float, dict]]) -> bytes:
+    """Pack pose data into a float32 blob.
+
+    Each frame is one row: [timestamp, x0, y0, vis0, x1, y1, vis1, ...] with
+    landmarks ordered by index. Decoding this is orders of magnitude cheaper
+    than parsing the equivalent JSON, which matters when re-scoring history.
+    """
+    rows = []
+    for timestamp, landmarks in pose_data:
+        row = [timestamp]
+        for idx in sorted(landmarks):
+            row.extend(landmarks[idx])
+        rows.append(row)
+    return np.asarray(rows, dtype=np.float32).tobytes()
+
+
+def deserialize_pose_data(
+    blob: bytes, frame_count: int
+) -> list[tuple[float, dict]]:
+    """Inverse of serialize_pose_data."""
+    if frame_count == 0:
+        return []
+    rows = np.frombuffer(blob, dtype=np.float32).reshape(frame_count, -1).tolist()
+    pose_data = []
+    for row in rows:
+        points = row[1:]
+        landmarks = {
+            idx: (points[i], points[i + 1], points[i + 2])
+            for idx, i in enumerate(range(0, len(points), 3))
+        }
+        pose_data.append((row[0], landmarks))
+    return pose_data
+
+
+def save_pose_series(
+    db: Session,
+    exercise_id: str,
+    exercise_name: str,
+    pose_data: list[tuple[float, dict]],
+) -> PoseSeries:
+    """Store (or replace) the pose series detected for an exercise."""
+    if not db.query(Exercise.id).filter(Exercise.id == exercise_id).first():
+        raise ValueError(f"No exercise found for id: {exercise_id}")
+
+    series = (
+        db.query(PoseSeries).filter(PoseSeries.exercise_id == exercise_id).first()
+    )
+    if series is None:
+        series = PoseSeries(exercise_id=exercise_id)
+        db.add(series)
+
+    series.exercise_name = exercise_name
+    series.frame_count = len(pose_data)
+    series.landmarks = serialize_pose_data(pose_data)
+    db.commit()
+    db.refresh(series)
+    return series
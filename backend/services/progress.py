@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from models.db_models import AnalysisResult, Exercise, ProgressRollup, User
+from models.schemas import ProgressPoint
+
+PERIODS = ("day", "week")
+
+
+def exercise_type(name: str) -> str:
+    """Normalize a user-entered exercise name into a rollup key."""
+    return name.strip().lower()
+
+
+def _period_start(period: str, when: datetime) -> date:
+    day = when.date()
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _period_bounds(period: str, start: date) -> tuple[datetime, datetime]:
+    length = timedelta(days=7 if period == "week" else 1)
+    lower = datetime.combine(start, time.min)
+    return lower, lower + length
+
+
+class RollupChange(NamedTuple):
+    """One result entering (sign +1) or leaving (sign -1) its rollups."""
+
+    user_id: str
+    exercise_name: str
+    created_at: datetime
+    score: int
+    category_scores: dict | None
+    sign: int
+
+
+def _rollup_keys(change: RollupChange) -> list[tuple]:
+    ex_type = exercise_type(change.exercise_name)
+    return [
+        (change.user_id, ex_type, period, _period_start(period, change.created_at))
+        for period in PERIODS
+    ]
+
+
+_KEY_COLUMNS = (
+    ProgressRollup.user_id,
+    ProgressRollup.exercise_type,
+    ProgressRollup.period,
+    ProgressRollup.period_start,
+)
+
+
+# What apply_rollup_changes writes back, keyed by primary key
+_DELTA_COLUMNS = (
+    "id",
+    "count",
+    "score_sum",
+    "score_min",
+    "score_max",
+    "category_sums",
+    "category_counts",
+)
+
+
+def _insert_missing_rollups(db: Session, keys: list[tuple]) -> None:
+    """Create empty rollups for keys that don't have one yet.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING so two first saves for the same
+    period can't both insert and trip the unique constraint.
+    """
+    rows = [
+        {
+            "user_id": user_id,
+            "exercise_type": ex_type,
+            "period": period,
+            "period_start": start,
+            "count": 0,
+            "score_sum": 0,
+            "category_sums": {},
+            "category_counts": {},
+        }
+        for user_id, ex_type, period, start in keys
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Progress rollups don't support {dialect}")
+    db.execute(
+        dialect_insert(ProgressRollup).on_conflict_do_nothing(
+            index_elements=[c.name for c in _KEY_COLUMNS]
+        ),
+        rows,
+    )
+
+
+def _lock_rollups(db: Session, keys: list[tuple]) -> dict[tuple, dict]:
+    """Read the rollups for keys as plain dicts, rows locked until commit."""
+    rows = db.execute(
+        select(ProgressRollup.__table__)
+        .where(tuple_(*_KEY_COLUMNS).in_(keys))
+        .order_by(ProgressRollup.id)  # consistent lock order across writers
+        .with_for_update()
+    ).mappings()
+    return {
+        (r["user_id"], r["exercise_type"], r["period"], r["period_start"]): dict(r)
+        for r in rows
+    }
+
+
+def _recompute_extremes(
+    db: Session, rollups: dict[tuple, dict], exclude_result_ids: Iterable[str]
+) -> None:
+    """Reset min/max of the given rollups from their periods' results.
+
+    One query grouped by user, exercise type and day over the affected
+    users and date range; days are then folded into the rollups' periods.
+    """
+    ex_type = func.lower(func.trim(Exercise.name))
+    day = func.date(Exercise.created_at)
+    bounds = [_period_bounds(period, start) for _, _, period, start in rollups]
+    query = (
+        select(
+            Exercise.user_id,
+            ex_type,
+            day,
+            func.min(AnalysisResult.score),
+            func.max(AnalysisResult.score),
+        )
+        .join(AnalysisResult, AnalysisResult.exercise_id == Exercise.id)
+        .where(
+            Exercise.user_id.in_({key[0] for key in rollups}),
+            ex_type.in_({key[1] for key in rollups}),
+            Exercise.created_at >= min(lower for lower, _ in bounds),
+            Exercise.created_at < max(upper for _, upper in bounds),
+        )
+        .group_by(Exercise.user_id, ex_type, day)
+    )
+    exclude = list(exclude_result_ids)
+    if exclude:
+        query = query.where(AnalysisResult.id.not_in(exclude))
+
+    extremes: dict[tuple, tuple[int, int]] = {}
+    for user_id, ex_type_value, day_value, low, high in db.execute(query):
+        when = datetime.combine(date.fromisoformat(str(day_value)), time.min)
+        for period in PERIODS:
+            key = (user_id, ex_type_value, period, _period_start(period, when))
+            if key in extremes:
+                low, high = min(low, extremes[key][0]), max(high, extremes[key][1])
+            extremes[key] = (low, high)
+
+    for key, rollup in rollups.items():
+        rollup["score_min"], rollup["score_max"] = extremes.get(key, (None, None))
+
+
+def apply_rollup_changes(
+    db: Session,
+    changes: Iterable[RollupChange],
+    exclude_result_ids: Iterable[str] = (),
+) -> None:
+    """Fold added and removed results into their day and week rollups.
+
+    Changes are summed per rollup first, so a batch costs a few statements
+    however many results it holds. Rollup rows are created race-free and
+    locked (SELECT ... FOR UPDATE) before they are changed, so concurrent
+    writers can't lose each other's updates. Min/max are only recomputed
+    from the results when a removed score was one of the extremes; removed
+    results that are still stored must be listed in exclude_result_ids, and
+    replacements must already be written.
+
+    Does not commit; the caller commits together with the results themselves.
+    """
+    deltas: dict[tuple, dict] = {}
+    for change in changes:
+        for key in _rollup_keys(change):
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = {
+                    "count": 0,
+                    "score_sum": 0,
+                    "added": [],
+                    "removed": [],
+                    "category_sums": {},
+                    "category_counts": {},
+                }
+            delta["count"] += change.sign
+            delta["score_sum"] += change.sign * change.score
+            delta["added" if change.sign > 0 else "removed"].append(change.score)
+            sums, counts = delta["category_sums"], delta["category_counts"]
+            for category, value in (change.category_scores or {}).items():
+                sums[category] = sums.get(category, 0.0) + change.sign * value
+                counts[category] = counts.get(category, 0) + change.sign
+    if not deltas:
+        return
+
+    # Removals from rollups that don't exist are skipped, so only create
+    # rows that something is being added to
+    created = [key for key, delta in deltas.items() if delta["added"]]
+    if created:
+        _insert_missing_rollups(db, created)
+    rollups = _lock_rollups(db, list(deltas))
+
+    updated, deleted, recompute = [], [], {}
+    for key, delta in deltas.items():
+        rollup = rollups.get(key)
+        if rollup is None:
+            continue
+        if rollup["count"] + delta["count"] <= 0:
+            deleted.append(rollup["id"])
+            continue
+
+        rollup["count"] += delta["count"]
+        rollup["score_sum"] += delta["score_sum"]
+
+        sums = dict(rollup["category_sums"])
+        counts = dict(rollup["category_counts"])
+        for category, diff in delta["category_counts"].items():
+            count = counts.get(category, 0) + diff
+            if count <= 0:
+                sums.pop(category, None)
+                counts.pop(category, None)
+            else:
+                counts[category] = count
+                sums[category] = sums.get(category, 0.0) + delta["category_sums"][category]
+        rollup["category_sums"] = sums
+        rollup["category_counts"] = counts
+
+        extremes = (rollup["score_min"], rollup["score_max"])
+        if any(score in extremes for score in delta["removed"]):
+            recompute[key] = rollup
+        else:
+            scores = delta["added"] + [s for s in extremes if s is not None]
+            rollup["score_min"], rollup["score_max"] = min(scores), max(scores)
+        updated.append(rollup)
+
+    if recompute:
+        db.flush()
+        _recompute_extremes(db, recompute, exclude_result_ids)
+    if updated:
+        db.execute(
+            update(ProgressRollup),
+            [{column: rollup[column] for column in _DELTA_COLUMNS} for rollup in updated],
+        )
+    if deleted:
+        db.execute(delete(ProgressRollup).where(ProgressRollup.id.in_(deleted)))
+
+
+def add_to_rollups(
+    db: Session, exercise: Exercise, score: int, category_scores: dict | None
+) -> None:
+    """Fold a newly saved result into its day and week rollups.
+
+    Does not commit; the caller commits together with the result itself.
+    """
+    apply_rollup_changes(
+        db,
+        [
+            RollupChange(
+                exercise.user_id,
+                exercise.name,
+                exercise.created_at,
+                score,
+                category_scores,
+                1,
+            )
+        ],
+    )
+
+
+def remove_from_rollups(
+    db: Session, exercise: Exercise, result: AnalysisResult
+) -> None:
+    """Take a result that is being replaced or deleted out of its rollups."""
+    apply_rollup_changes(
+        db,
+        [
+            RollupChange(
+                exercise.user_id,
+                exercise.name,
+                exercise.created_at,
+                result.score,
+                result.category_scores,
+                -1,
+            )
+        ],
+        exclude_result_ids=[result.id],
+    )
+
+
+def get_progress(
+    db: Session,
+    cognito_user_id: str,
+    period: str = "week",
+    ex_type: str | None = None,
+) -> list[ProgressPoint]:
+    query = (
+        db.query(ProgressRollup)
+        .join(User, User.id == ProgressRollup.user_id)
+        .filter(User.cognito_user_id == cognito_user_id, ProgressRollup.period == period)
+    )
+    if ex_type:
+        query = query.filter(ProgressRollup.exercise_type == exercise_type(ex_type))
+
+    points = []
+    for rollup in query.order_by(ProgressRollup.period_start).all():
+        points.append(
+            ProgressPoint(
+                exercise_type=rollup.exercise_type,
+                period=rollup.period,
+                period_start=rollup.period_start,
+                count=rollup.count,
+                mean_score=round(rollup.score_sum / rollup.count, 1),
+                min_score=rollup.score_min,
+                max_score=rollup.score_max,
+                category_averages={
+                    category: round(total / rollup.category_counts[category], 3)
+                    for category, total in rollup.category_sums.items()
+                },
+            )
+        )
+    return points
+
+
+def rebuild_rollups(db: Session, user_id: str | None = None) -> int:
+    """Recompute rollups from the full analysis history.
+
+    Streams results instead of loading them into the ORM and replaces the
+    existing rollups (for one user, or everyone) in a single transaction.
+    Returns the number of rollup rows written.
+    """
+    query = (
+        db.query(
+            Exercise.user_id,
+            Exercise.name,
+            Exercise.created_at,
+            AnalysisResult.score,
+            AnalysisResult.category_scores,
+        )
+        .join(AnalysisResult, AnalysisResult.exercise_id == Exercise.id)
+        .execution_options(yield_per=1000)
+    )
+    if user_id:
+        query = query.filter(Exercise.user_id == user_id)
+
+    buckets: dict[tuple, dict] = {}
+    for uid, name, created_at, score, category_scores in query:
+        ex_type = exercise_type(name)
+        for period in PERIODS:
+            start = _period_start(period, created_at)
+            key = (uid, ex_type, period, start)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {
+                    "user_id": uid,
+                    "exercise_type": ex_type,
+                    "period": period,
+                    "period_start": start,
+                    "count": 0,
+                    "score_sum": 0,
+                    "score_min": score,
+                    "score_max": score,
+                    "category_sums": {},
+                    "category_counts": {},
+                }
+            bucket["count"] += 1
+            bucket["score_sum"] += score
+            bucket["score_min"] = min(bucket["score_min"], score)
+            bucket["score_max"] = max(bucket["score_max"], score)
+            for category, value in (category_scores or {}).items():
+                sums, counts = bucket["category_sums"], bucket["category_counts"]
+                sums[category] = sums.get(category, 0.0) + value
+                counts[category] = counts.get(category, 0) + 1
+
+    stale = delete(ProgressRollup)
+    if user_id:
+        stale = stale.where(ProgressRollup.user_id == user_id)
+    db.execute(stale)
+    if buckets:
+        db.execute(insert(ProgressRollup), list(buckets.values()))
+    db.commit()
+    return len(buckets)
@@ -0,0 +1,85 @@
+"""Coalesce concurrent identical calls into one execution.
+
+Mobile retries and double-taps send the same analysis request while the
+first is still running. SingleFlight lets the first caller for a key run
+the work while later callers with the same key wait for it and receive
+the same result, or the same exception. The key is forgotten as soon as
+the call finishes, so nothing is cached beyond the in-flight window.
+
+Each waiter blocks its thread for the whole call, so the number of waiters
+per key is capped; callers beyond that get TooManyWaiters straight away.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class TooManyWaiters(Exception):
+    """Raised when a key already has max_waiters callers waiting on it."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, max_waiters: int | None = None):
+        self.max_waiters = max_waiters
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._executed = 0
+        self._coalesced = 0
+        self._rejected = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run fn once for all concurrent callers sharing key.
+
+        Raises:
+            TooManyWaiters: if the key is running and already has
+                max_waiters callers waiting on it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+            elif self.max_waiters is not None and call.waiters >= self.max_waiters:
+                self._rejected += 1
+                raise TooManyWaiters(f"{call.waiters} callers already waiting")
+            else:
+                call.waiters += 1
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed_total": self._executed,
+                "coalesced_total": self._coalesced,
+                "rejected_total": self._rejected,
+            }
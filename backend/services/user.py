@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from typing import Iterable
+
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from models.db_models import User
@@ -24,3 +27,31 @@ def get_or_create_user(db: Session, data: UserCreate) -> User:
 
 def get_user_by_cognito_id(db: Session, cognito_user_id: str) -> User | None:
     return db.query(User).filter(User.cognito_user_id == cognito_user_id).first()
+
+
+def get_user_version(db: Session, cognito_user_id: str) -> tuple[str, int] | None:
+    """(user id, data version) read from the users row alone."""
+    row = db.execute(
+        select(User.id, User.data_version).where(User.cognito_user_id == cognito_user_id)
+    ).first()
+    if row is None:
+        return None
+    return row.id, row.data_version or 0
+
+
+def bump_data_version(db: Session, user_id: str) -> None:
+    """Mark the user's data as changed. Does not commit, so the bump lands
+    in the same transaction as the change itself."""
+    bump_data_versions(db, [user_id])
+
+
+def bump_data_versions(db: Session, user_ids: Iterable[str]) -> None:
+    """bump_data_version for many users in one statement."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    db.execute(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(data_version=func.coalesce(User.data_version, 0) + 1)
+    )
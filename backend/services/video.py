@@ -2,27 +2,99 @@ from __future__ import annotations
 
 import os
 import tempfile
+import time
 import urllib.request
+from typing import Iterator
 
-import cv2
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def download_video(video_url: str) -> str:
-    """Download video from a URL (pre-signed S3 or direct) to a temp file."""
+# Socket timeout for downloads without a deadline
+DOWNLOAD_TIMEOUT_SECONDS = 60
+_CHUNK_BYTES = 64 * 1024
+
+
+class DownloadTimeout(TimeoutError):
+    """Raised when a download doesn't finish before its deadline."""
+
+
+def download_video(video_url: str, deadline: float | None = None) -> str:
+    """Download video from a URL (pre-signed S3 or direct) to a temp file.
+
+    Args:
+        video_url: URL to fetch
+        deadline: time.monotonic() value the download must finish by, or None
+
+    Raises:
+        DownloadTimeout: if the deadline passes or the socket stalls past it
+    """
+    def remaining() -> float:
+        if deadline is None:
+            return DOWNLOAD_TIMEOUT_SECONDS
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise DownloadTimeout("Deadline reached while downloading the video")
+        return left
+
     tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
-    urllib.request.urlretrieve(video_url, tmp.name)
+    try:
+        with tmp, urllib.request.urlopen(video_url, timeout=remaining()) as response:
+            # read1 returns what has arrived, so a slow trickle still hits
+            # the deadline check between chunks
+            while chunk := response.read1(_CHUNK_BYTES):
+                tmp.write(chunk)
+                remaining()
+    except TimeoutError as e:  # socket.timeout is an alias since 3.10
+        os.unlink(tmp.name)
+        if isinstance(e, DownloadTimeout):
+            raise
+        raise DownloadTimeout(f"Download stalled: {e}") from e
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
     return tmp.name
 
 
-def extract_frames(video_path: str, fps: int = 5) -> list[tuple[float, any]]:
-    """Extract frames from video at the given FPS rate.
+def probe_video(video_path: str) -> dict:
+    """Read basic stream properties without decoding any frames.
 
     Returns:
-        List of (timestamp_seconds, frame) tuples
+        Dict with fps, frame_count, width, height and duration (seconds)
     """
+    import cv2  # deferred: only analysis requests need OpenCV
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+
+    video_fps = cap.get(cv2.CAP_PROP_FPS)
+    if video_fps <= 0:
+        video_fps = 30.0
+    frame_count = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    info = {
+        "fps": video_fps,
+        "frame_count": frame_count,
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "duration": frame_count / video_fps,
+    }
+    cap.release()
+    return info
+
+
+def iter_frames(
+    video_path: str, fps: int = 5, max_width: int | None = None
+) -> Iterator[tuple[float, any]]:
+    """Lazily yield (timestamp_seconds, frame) at the given FPS rate.
+
+    Frames that aren't sampled are only grabbed, not decoded into images,
+    and sampled frames wider than max_width are downscaled. Nothing is held
+    in memory beyond the current frame, so callers can stop at any point.
+    """
+    import cv2  # deferred: only analysis requests need OpenCV
+
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise ValueError(f"Could not open video: {video_path}")
@@ -32,19 +104,33 @@ def extract_frames(video_path: str, fps: int = 5) -> list[tuple[float, any]]:
         video_fps = 30.0
 
     frame_interval = max(1, int(video_fps / fps))
-    frames = []
     frame_idx = 0
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    try:
+        while cap.grab():
+            if frame_idx % frame_interval == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                if max_width and frame.shape[1] > max_width:
+                    scale = max_width / frame.shape[1]
+                    frame = cv2.resize(
+                        frame,
+                        (max_width, round(frame.shape[0] * scale)),
+                        interpolation=cv2.INTER_AREA,
+                    )
+                yield frame_idx / video_fps, frame
+            frame_idx += 1
+    finally:
+        cap.release()
 
-        if frame_idx % frame_interval == 0:
-            timestamp = frame_idx / video_fps
-            frames.append((timestamp, frame))
 
-        frame_idx += 1
+def extract_frames(
+    video_path: str, fps: int = 5, max_width: int | None = None
+) -> list[tuple[float, any]]:
+    """Extract frames from video at the given FPS rate.
 
-    cap.release()
-    return frames
+    Returns:
+        List of (timestamp_seconds, frame) tuples
+    """
+    return list(iter_frames(video_path, fps, max_width))
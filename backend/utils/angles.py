@@ -42,3 +42,27 @@ def angle_to_vertical(a: tuple, b: tuple) -> float:
     # Vertical is (0, 1) in image coordinates (y increases downward)
     angle = np.degrees(np.arctan2(abs(dx), abs(dy)))
     return float(angle)
+
+
+def calculate_angles(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Vectorized calculate_angle over arrays of (x, y) points.
+
+    Args:
+        a, b, c: Arrays of shape (n, 2); b holds the vertex points
+
+    Returns:
+        Array of n angles in degrees (0-180)
+    """
+    ba = a - b
+    bc = c - b
+
+    dot = np.einsum("ij,ij->i", ba, bc)
+    norms = np.linalg.norm(ba, axis=1) * np.linalg.norm(bc, axis=1)
+    cosine = np.clip(dot / (norms + 1e-8), -1.0, 1.0)
+    return np.degrees(np.arccos(cosine))
+
+
+def angles_to_vertical(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Vectorized angle_to_vertical over arrays of (x, y) points."""
+    d = np.abs(b - a)
+    return np.degrees(np.arctan2(d[:, 0], d[:, 1]))
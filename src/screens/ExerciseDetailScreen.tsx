@@ -15,6 +15,7 @@ import {RootStackParamList} from '../types';
 import {useExercises} from '../context/ExerciseContext';
 import {analyzeForm, saveAnalysisResult} from '../services/analysisApi';
 import {useTheme} from '../context/ThemeContext';
+import {useAuth} from '../context/AuthContext';
 import {ThemeColors} from '../styles/colors';
 
 type ExerciseDetailRouteProp = RouteProp<RootStackParamList, 'ExerciseDetail'>;
@@ -27,6 +28,7 @@ export default function ExerciseDetailScreen() {
   const [paused, setPaused] = useState(true);
   const [analyzing, setAnalyzing] = useState(false);
   const {colors} = useTheme();
+  const {user} = useAuth();
   const styles = useMemo(() => createStyles(colors), [colors]);
 
   const exercise = getExerciseById(route.params.exerciseId);
@@ -47,7 +49,12 @@ export default function ExerciseDetailScreen() {
 
     setAnalyzing(true);
     try {
-      const result = await analyzeForm(exercise.videoUri, exercise.name);
+      const result = await analyzeForm(
+        exercise.videoUri,
+        exercise.name,
+        exercise.id,
+        user?.userId,
+      );
       await saveAnalysisResult(exercise.id, result);
       updateExercise(exercise.id, {analysisResult: result});
     } catch (error: any) {
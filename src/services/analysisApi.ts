@@ -11,6 +11,9 @@ const API_BASE_URL = __DEV__
 export async function analyzeForm(
   videoUrl: string,
   exerciseName: string,
+  exerciseId?: string,
+  cognitoUserId?: string,
+  timelinePoints?: number,
 ): Promise<FormAnalysis> {
   const response = await fetch(`${API_BASE_URL}/api/analyze`, {
     method: 'POST',
@@ -18,10 +21,63 @@ export async function analyzeForm(
     body: JSON.stringify({
       video_url: videoUrl,
       exercise_name: exerciseName,
+      exercise_id: exerciseId ?? null,
+      cognito_user_id: cognitoUserId ?? null,
+      timeline_points: timelinePoints ?? null,
     }),
   });
 
   if (!response.ok) {
+    if (response.status === 429 || response.status === 503) {
+      const retryAfter = response.headers.get('Retry-After');
+      throw new Error(
+        `The analysis service is busy. Please try again${
+          retryAfter ? ` in ${retryAfter} seconds` : ' shortly'
+        }.`,
+      );
+    }
+    const error = await response.json().catch(() => ({detail: 'Unknown error'}));
+    throw new Error(error.detail || `Analysis failed (${response.status})`);
+  }
+
+  return response.json();
+}
+
+/**
+ * Analyze landmarks computed on-device. `series` is the binary encoding
+ * described in backend/services/landmark_codec.py.
+ */
+export async function analyzeLandmarks(
+  series: ArrayBuffer,
+  exerciseName: string,
+  exerciseId?: string,
+  timelinePoints?: number,
+): Promise<FormAnalysis> {
+  const params = new URLSearchParams({exercise_name: exerciseName});
+  if (exerciseId) {
+    params.append('exercise_id', exerciseId);
+  }
+  if (timelinePoints) {
+    params.append('timeline_points', String(timelinePoints));
+  }
+  const response = await fetch(
+    `${API_BASE_URL}/api/analyze/landmarks?${params.toString()}`,
+    {
+      method: 'POST',
+      headers: {'Content-Type': 'application/octet-stream'},
+      body: series,
+    },
+  );
+
+  if (!response.ok) {
+    if (response.status === 429 || response.status === 503) {
+      const retryAfter = response.headers.get('Retry-After');
+      throw new Error(
+        `The analysis service is busy. Please try again${
+          retryAfter ? ` in ${retryAfter} seconds` : ' shortly'
+        }.`,
+      );
+    }
     const error = await response.json().catch(() => ({detail: 'Unknown error'}));
     throw new Error(error.detail || `Analysis failed (${response.status})`);
   }
@@ -70,16 +126,29 @@ function mapExercise(e: any): Exercise {
   };
 }
 
+// Last exercise list per user with its ETag, so polls can revalidate
+// instead of downloading the list again
+const exerciseCache = new Map<string, {etag: string; data: any[]}>();
+
 export async function fetchExercises(cognitoUserId: string): Promise<Exercise[]> {
+  const cached = exerciseCache.get(cognitoUserId);
   const response = await fetch(
     `${API_BASE_URL}/api/exercises/${cognitoUserId}`,
+    {headers: cached ? {'If-None-Match': cached.etag} : {}},
   );
 
+  if (response.status === 304 && cached) {
+    return cached.data.map(mapExercise);
+  }
   if (!response.ok) {
     throw new Error('Failed to fetch exercises');
   }
 
   const data = await response.json();
+  const etag = response.headers.get('ETag');
+  if (etag) {
+    exerciseCache.set(cognitoUserId, {etag, data});
+  }
   return data.map(mapExercise);
 }
 
@@ -139,6 +208,8 @@ export async function saveAnalysisResult(
         score: analysis.score,
         feedback: analysis.feedback,
         key_points: analysis.keyPoints,
+        category_scores: analysis.categoryScores ?? null,
+        analyzer_version: analysis.analyzerVersion ?? null,
       }),
     },
   );
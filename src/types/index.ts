@@ -30,6 +30,17 @@ export interface FormAnalysis {
     issue: string;
     severity: 'low' | 'medium' | 'high';
   }[];
+  categoryScores?: Record<string, number>;
+  analyzerVersion?: string;
+  degradations?: string[];
+  timeline?: AngleTimeline;
+}
+
+export interface AngleTimeline {
+  timestamps: number[];
+  // Degrees, keyed by angle name (e.g. "knee_angle"), aligned with timestamps
+  angles: Record<string, number[]>;
+  reps: {start: number; bottom: number; end: number}[];
 }
 
 // Video types